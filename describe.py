@@ -13,28 +13,70 @@ Functionality:
     - Uses the Describe class to compute count, mean, std, min, max,
       and percentile statistics for each numerical column.
     - Prints the computed summary table.
+    - Optionally streams the file in chunks (--chunksize), keeping a single
+      chunk in memory, to describe files larger than the available RAM.
+    - Optionally reports any list of percentiles (--percentiles) and estimates
+      them with fixed-memory sketches for a given rank error (--error).
+    - Optionally computes the statistics per group of a column (--by) and
+      only the requested statistics (--stats).
+    - Optionally keeps the statistics in a state file (--state) updated with
+      the appended rows only, and merges states computed elsewhere (--merge).
+    - Optionally splits the columns across worker processes (--workers).
+    - Optionally memory-maps the parsed dataset from a binary cache (--cache).
     - Optionally compares the manual implementation with pandas' built-in
       describe() for debugging purposes (via the --test flag).
 
 Usage:
     python describe.py dataset_train.csv
     python describe.py dataset_train.csv --test
+    python describe.py dataset_train.csv --chunksize 100000
+    python describe.py dataset_train.csv --percentiles 0.05 0.5 0.95 --error 0.01
+    python describe.py dataset_train.csv --by "Hogwarts House" --stats mean std
+    python describe.py dataset_train.csv --state describe_state.json
+    python describe.py wide_export.csv --workers 8
+    python describe.py dataset_train.csv --cache
 
 Arguments:
     filename : Path to the CSV dataset.
     --test / -t : Optional flag to validate results against pandas.describe().
+    --chunksize / -c : Optional number of rows read at a time. Quantiles are
+        then estimated with bounded-memory sketches.
+    --percentiles / -p : Optional list of quantiles (between 0 and 1) to
+        report instead of the quartiles.
+    --error / -e : Optional normalized rank error of the approximate
+        quantiles (e.g. 0.01). Sketch memory per column follows from it.
+    --by / -b : Optional column whose groups are described separately.
+    --stats / -s : Optional list of statistics to compute (e.g. mean std 50%).
+    --state : Optional state file (JSON). When it exists, only the rows
+        appended to the dataset since it was saved are read; the updated
+        state is saved back.
+    --workers / -w : Optional number of processes the columns are split
+        across (0: one per available core). Small inputs run serially. Not
+        available in streaming mode (--chunksize, --state, --merge).
+    --merge : Optional state files computed elsewhere (other shards) merged
+        into the printed statistics (not into the saved state).
+    --cache : Optional flag to keep the parsed columns in a binary cache
+        (DSLR_CACHE_DIR, default ~/.cache/dslr) and map them on later runs
+        instead of parsing the CSV again. Unused in streaming mode.
 
 This script is part of the Data Science × Logistic Regression project.
 """
 
 from utils.utils import read_file
 from describe.describe_class import Describe
+from describe.streaming import StreamingDescribe
+from describe.state import DescribeState
+from describe.engine import check_percentiles, check_stats
+from describe.sketch import k_for_error, DEFAULT_K
 from test.describe import test_describe
 import pandas as pd
 import argparse
 import os.path
 import sys
 
+# Rows read at a time when updating a saved state without --chunksize
+DEFAULT_CHUNKSIZE = 100000
+
 def arguments_configuration():
     """
     Configures and parses command-line arguments for the describe tool.
@@ -44,10 +86,28 @@ def arguments_configuration():
             - filename (str): The path to the input CSV dataset.
             - test (bool): Whether to run the optional comparison between the
               manual Describe output and pandas' describe() method.
+            - chunksize (int | None): Rows per chunk in streaming mode.
+            - percentiles (list[float] | None): Quantiles to report.
+            - error (float | None): Rank error of the approximate quantiles.
+            - by (str | None): Column used to group the rows.
+            - stats (list[str] | None): Statistics to compute.
+            - state (str | None): Path of the persistent state file.
+            - merge (list[str] | None): State files to merge in.
+            - workers (int): Processes computing the column statistics.
+            - cache (bool): Whether to use the binary dataset cache.
 
     The function defines:
         -- A required positional argument: 'filename'.
         -- An optional '--test' / '-t' flag to trigger result comparison.
+        -- An optional '--chunksize' / '-c' value to stream the file.
+        -- Optional '--percentiles' / '-p' and '--error' / '-e' values to
+           choose the quantiles and switch to approximate quantiles.
+        -- Optional '--by' / '-b' and '--stats' / '-s' values for grouped
+           statistics and to restrict the statistics computed.
+        -- Optional '--state' and '--merge' values for incremental and
+           merged statistics.
+        -- An optional '--workers' / '-w' value for process-parallel columns.
+        -- An optional '--cache' flag to reuse the parsed dataset.
 
     This parser is used to control how the script behaves when executed from
     the command line.
@@ -59,15 +119,95 @@ def arguments_configuration():
 
     parser.add_argument('filename')
     parser.add_argument('--test', '-t', action='store_true', help='Compare the results of the manual describe to the results of describe method of pandas')
+    parser.add_argument('--chunksize', '-c', type=int, help='Read the file in chunks of this many rows instead of loading it whole')
+    parser.add_argument('--percentiles', '-p', type=float, nargs='+', help='Quantiles to report, between 0 and 1 (default: 0.25 0.5 0.75)')
+    parser.add_argument('--error', '-e', type=float, help='Estimate quantiles with sketches of this normalized rank error (e.g. 0.01)')
+    parser.add_argument('--by', '-b', help='Compute the statistics for every group of this column')
+    parser.add_argument('--stats', '-s', nargs='+', help='Statistics to compute, e.g. mean std 50%% (default: all)')
+    parser.add_argument('--workers', '-w', type=int, default=1, help='Processes computing the column statistics, 0 for one per available core')
+    parser.add_argument('--state', help='State file: loaded if it exists, updated with the rows appended to the dataset since, and saved back')
+    parser.add_argument('--merge', nargs='+', help='State files computed elsewhere to merge into the printed statistics')
+    parser.add_argument('--cache', action='store_true', help='Keep the parsed dataset in a binary cache and memory-map it on later runs')
 
     return parser.parse_args()
 
 
+def read_state(path):
+    """
+    Loads a saved DescribeState (e.g. to merge). Exits with a message if the
+    file does not exist or cannot be read.
+    """
+    try:
+        return DescribeState.load(path)
+    except FileNotFoundError:
+        print(f'Error: couldn´t find the state file {path}')
+        sys.exit(1)
+    except Exception as e:
+        print(f'An exception type {type(e).__name__} has ocurred, please check the state file {path}')
+        sys.exit(1)
+
+
+def load_state(path, k):
+    """
+    Loads the --state DescribeState, or returns an empty one if `path` does
+    not exist yet. Exits with a message if the file cannot be read.
+    """
+    if not os.path.exists(path):
+        return DescribeState(k)
+    return read_state(path)
+
+
 if __name__ == "__main__":
     args = arguments_configuration()
     file_path = os.path.abspath(args.filename)
-    data = read_file(file_path)
-    d = Describe(data)
-    d.print()
-    if args.test:
-        test_describe(data)
+    try:
+        percentiles = check_percentiles(args.percentiles)
+        check_stats(args.stats, percentiles)
+        k = k_for_error(args.error) if args.error is not None else DEFAULT_K
+    except ValueError as e:
+        print(f'Error: {e}')
+        sys.exit(1)
+    streaming = args.chunksize is not None or args.state is not None or args.merge is not None
+    if args.by is not None and (streaming or args.error is not None):
+        print("--by cannot be combined with --chunksize, --error, --state or --merge")
+        sys.exit(1)
+    if args.chunksize is not None and args.chunksize <= 0:
+        print("chunksize must be a positive number")
+        sys.exit(1)
+    if args.workers < 0:
+        print("workers must be a positive number, or 0 for one per core")
+        sys.exit(1)
+    if args.workers != 1 and streaming:
+        print("--workers cannot be combined with --chunksize, --state or --merge")
+        sys.exit(1)
+
+    if streaming:
+        chunksize = args.chunksize or DEFAULT_CHUNKSIZE
+        if args.state is not None:
+            # Only the rows appended since the state was saved are read
+            state = load_state(args.state, k)
+            state.update_file(file_path, chunksize)
+            state.save(args.state)
+        else:
+            state = DescribeState(k)
+            state.update_file(file_path, chunksize)
+        for path in args.merge or []:
+            try:
+                state.merge(read_state(path))
+            except ValueError as e:
+                print(f'Error: cannot merge {path}: {e}')
+                sys.exit(1)
+        d = StreamingDescribe([], percentiles, state=state, stats=args.stats)
+        d.print()
+        if args.test:
+            test_describe(read_file(file_path, args.cache))
+    else:
+        data = read_file(file_path, args.cache)
+        try:
+            d = Describe(data, percentiles, args.error, args.by, args.stats, args.workers)
+        except KeyError:
+            print(f"Column '{args.by}' not found in dataset")
+            sys.exit(1)
+        d.print()
+        if args.test:
+            test_describe(data)
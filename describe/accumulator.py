@@ -0,0 +1,152 @@
+import numpy as np
+from describe.engine import percentile_label
+from describe.sketch import KLLSketch, DEFAULT_K
+
+
+class Moments():
+    """
+    Mergeable count, mean, sum of squared deviations (M2, Welford) and
+    extrema of a fixed set of columns, fed one block of rows at a time.
+
+    Each block is reduced with vectorized operations and folded into the
+    totals with the pairwise update of Chan et al., so two accumulators built
+    on different parts of the data can also be merged. Missing values (NaN)
+    are ignored.
+
+    Attributes:
+        columns (list): Names of the tracked columns.
+        count, mean, m2, min, max (np.ndarray): One value per column.
+
+    Methods:
+        update(matrix):
+            Folds a float matrix of shape (rows, columns) into the totals.
+
+        merge(other):
+            Folds the totals of another accumulator over the same columns.
+
+        to_dict() / from_dict(data):
+            Serialization to and from JSON-compatible dicts.
+    """
+    def __init__(self, columns):
+        self.columns = list(columns)
+        features = len(self.columns)
+        self.count = np.zeros(features)
+        self.mean = np.zeros(features)
+        self.m2 = np.zeros(features)
+        self.min = np.full(features, np.inf)
+        self.max = np.full(features, -np.inf)
+
+    def combine(self, count, mean, m2, min, max):
+        total = self.count + count
+        safe_total = np.where(total > 0, total, 1)
+        delta = mean - self.mean
+        self.mean = np.where(total > 0, self.mean + delta * count / safe_total, 0.0)
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * count / safe_total
+        self.count = total
+        self.min = np.minimum(self.min, min)
+        self.max = np.maximum(self.max, max)
+
+    def update(self, matrix: np.ndarray):
+        missing = np.isnan(matrix)
+        count = (~missing).sum(axis=0)
+        safe_count = np.where(count > 0, count, 1)
+        mean = np.where(missing, 0.0, matrix).sum(axis=0) / safe_count
+        m2 = np.where(missing, 0.0, (matrix - mean) ** 2).sum(axis=0)
+        min = np.where(missing, np.inf, matrix).min(axis=0, initial=np.inf)
+        max = np.where(missing, -np.inf, matrix).max(axis=0, initial=-np.inf)
+        self.combine(count, mean, m2, min, max)
+
+    def merge(self, other):
+        if other.columns != self.columns:
+            raise ValueError("Cannot merge statistics computed over different columns")
+        self.combine(other.count, other.mean, other.m2, other.min, other.max)
+
+    def to_dict(self):
+        return {
+            "columns": self.columns,
+            "count": self.count.tolist(),
+            "mean": self.mean.tolist(),
+            "m2": self.m2.tolist(),
+            "min": self.min.tolist(),
+            "max": self.max.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        accumulator = cls(data["columns"])
+        accumulator.count = np.asarray(data["count"], dtype=np.float64)
+        accumulator.mean = np.asarray(data["mean"], dtype=np.float64)
+        accumulator.m2 = np.asarray(data["m2"], dtype=np.float64)
+        accumulator.min = np.asarray(data["min"], dtype=np.float64)
+        accumulator.max = np.asarray(data["max"], dtype=np.float64)
+        return accumulator
+
+
+class StreamingStats(Moments):
+    """
+    Mergeable accumulators for the Describe statistics of a fixed set of
+    columns, fed one block of rows at a time.
+
+    For every column it keeps the moments and extrema of `Moments` and a KLL
+    quantile sketch, so two accumulators built on different parts of the
+    data can also be merged.
+
+    Attributes:
+        columns (list): Names of the tracked columns.
+        count, mean, m2, min, max (np.ndarray): One value per column.
+        sketches (list[KLLSketch]): One quantile sketch per column.
+
+    Methods:
+        update(matrix):
+            Folds a float matrix of shape (rows, columns) into the totals.
+
+        merge(other):
+            Folds the totals of another accumulator over the same columns.
+
+        stats(percentiles):
+            Returns the statistics in the format of describe.engine.column_stats.
+
+        to_dict() / from_dict(data):
+            Serialization to and from JSON-compatible dicts, so partial results
+            computed on different shards can be stored and merged later.
+    """
+    def __init__(self, columns, k=DEFAULT_K):
+        super().__init__(columns)
+        self.sketches = [KLLSketch(k) for _ in self.columns]
+
+    def update(self, matrix: np.ndarray):
+        super().update(matrix)
+        for column, sketch in enumerate(self.sketches):
+            sketch.update(matrix[:, column])
+
+    def merge(self, other):
+        super().merge(other)
+        for sketch, other_sketch in zip(self.sketches, other.sketches):
+            sketch.merge(other_sketch)
+
+    def to_dict(self):
+        data = super().to_dict()
+        data["sketches"] = [sketch.to_dict() for sketch in self.sketches]
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        accumulator = super().from_dict(data)
+        accumulator.sketches = [KLLSketch.from_dict(sketch) for sketch in data["sketches"]]
+        return accumulator
+
+    def stats(self, percentiles):
+        has_values = self.count > 0
+        safe_count = np.where(self.count > 1, self.count - 1, 1)
+        std = np.where(self.count > 1, (self.m2 / safe_count) ** 0.5, 0.0)
+        stats = {
+            'count': self.count.astype(float),
+            'mean': np.where(has_values, self.mean, np.nan),
+            'std': np.where(has_values, std, np.nan),
+            'min': np.where(has_values, self.min, np.nan),
+            'max': np.where(has_values, self.max, np.nan),
+        }
+        quantiles = np.array([sketch.quantile(percentiles) for sketch in self.sketches]).reshape(len(self.columns), len(percentiles))
+        for i, percent in enumerate(percentiles):
+            stats[percentile_label(percent)] = quantiles[:, i]
+        return stats
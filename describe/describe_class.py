@@ -1,5 +1,10 @@
 import pandas as pd
-import sys
+from describe.engine import numeric_matrix, stats_table, check_percentiles
+from describe.engine import check_stats, needed_work, group_codes, grouped_stats, grouped_table
+from describe.accumulator import StreamingStats
+from describe.sketch import k_for_error, DEFAULT_K
+from describe.state import DescribeState
+from describe.parallel import parallel_column_stats
 
 # FALTA AÑADIR LOS PARAMETROIS DE DESCRIBE1º
 
@@ -15,31 +20,59 @@ class   Describe():
         - Count: Number of non-NaN values.
         - Mean: Arithmetic average of the values.
         - Standard Deviation (std): Sample standard deviation computed manually.
-        - Min / Max: Minimum and maximum values obtained by iterating through the data.
-        - 25%, 50%, 75% percentiles: Quartiles computed using a custom percentile
-          function with linear interpolation.
+        - Min / Max: Minimum and maximum values read from the sorted column.
+        - Percentiles (25%, 50% and 75% by default, any list can be
+          requested): computed with linear interpolation between the closest
+          ranks.
+
+    With `error` set, quantiles are estimated instead with one KLL sketch per
+    column sized for that normalized rank error: memory per column is fixed
+    and no column is sorted. The sketches stay available in `accumulator`
+    (a describe.accumulator.StreamingStats) to be serialized or merged with the
+    results of other shards.
+
+    With `by` set to a column name, the statistics are computed for every
+    group of that column in a single scan (group codes and scatter-add
+    reductions) and `result` has a (group, statistic) row index.
+
+    `workers` splits the columns across that many processes (0: one per
+    available core) sharing the data through shared memory; small inputs
+    are still computed serially, where process startup would dominate.
+
+    `stats` restricts the computation to a list of statistics (row labels
+    such as 'mean' or '25%'): quantile work, including the sort, is skipped
+    when no quantile is requested.
 
     Steps performed:
-        1. Select numerical columns from the input DataFrame.
-        2. Remove NaN values and convert data to float.
-        3. Manually compute each statistic without using forbidden library functions.
+        1. Gather every numerical column into a single float matrix.
+        2. Compute count, mean and std for all columns at once with masked,
+           vectorized sums (see describe.engine).
+        3. Sort each column once, only if quantiles are requested, and read
+           min, max and the quantiles from the sorted block.
         4. Assemble the results into a pandas DataFrame for formatted output.
 
     Attributes:
         df (DataFrame): The original input dataset.
+        percentiles (list): Quantiles reported in the table.
+        error (float | None): Rank error of the approximate quantiles, None
+            for exact quantiles.
+        accumulator (StreamingStats | None): Approximate mode accumulators.
+        by (str | None): Column used to group the rows.
+        stats (list): Statistics reported in the table.
+        workers (int): Processes used to compute the exact statistics.
         result (DataFrame): A DataFrame containing all computed statistics.
 
     Methods:
-        get_min_max(clean_df):
-            Computes the minimum and maximum values of a cleaned numerical series.
-
-        percentile(data, percent):
-            Computes a percentile value using sorted data and linear interpolation.
-
         get_stats():
             Calculates all required statistics for each numeric feature and stores
             them in the `result` attribute.
 
+        get_grouped_stats():
+            Same as get_stats for every group of the `by` column.
+
+        state:
+            Mergeable, persistent state of the statistics (describe.state).
+
         print():
             Displays the computed statistics table.
 
@@ -47,96 +80,59 @@ class   Describe():
         df = pd.read_csv("dataset_train.csv")
         desc = Describe(df)
         desc.print()
+        desc = Describe(df, percentiles=[0.05, 0.5, 0.95], error=0.01)
+        means = Describe(df, by="Hogwarts House", stats=["mean"]).result.xs("mean", level=1)
     """
-    def __init__(self, data: pd.DataFrame):
-        self.pq1 = 0.25
-        self.pq2 = 0.5
-        self.pq3 = 0.75
+    def __init__(self, data: pd.DataFrame, percentiles=None, error=None, by=None, stats=None, workers=1):
+        self.percentiles = check_percentiles(percentiles)
+        self.stats = check_stats(stats, self.percentiles)
+        if error is not None and by is not None:
+            raise ValueError("Approximate quantiles are not available for grouped statistics")
+        self.error = error
+        self.by = by
+        self.workers = workers
+        self.accumulator = None
+        self._state = None
         self.df = data
-        self.get_stats()
-
-    def get_min_max(self, clean_df):
-        min = max = clean_df.iloc[0]
-        for item in clean_df:
-            if item < min:
-                min = item
-            if item > max:
-                max = item
-        return min, max
-    
-    def percentile(self, data, percent):
-        data_sorted = sorted(data)
-        if len(data_sorted) == 0:
-            return float('nan')
-        k = (len(data_sorted) - 1) * percent
-        f = int(k)
-        c = f + 1
-        if c >= len(data_sorted):
-            return data_sorted[f]
-        return data_sorted[f] + (data_sorted[c] - data_sorted[f]) * (k - f)
-
+        if self.by is None:
+            self.get_stats()
+        else:
+            self.get_grouped_stats()
 
     def get_stats(self):
-
-        # Gets features with numeric values
-        df_to_stats = self.df.select_dtypes(include=['float', 'int'])
-
-        count, mean, std, min, max, pq1, pq2, pq3, index = [], [], [], [], [], [], [], [], []
-
-
-        for feature in df_to_stats.columns:
-            index.append(feature)
-            # remove nan values
-            clean_df = df_to_stats[feature].dropna().astype(float)
-
-            # if there are no valid values
-            if clean_df.__len__() == 0:
-                count.append(0)
-                mean.append(float('nan'))
-                std.append(float('nan'))
-                min.append(float('nan'))
-                max.append(float('nan'))
-                pq1.append(float('nan'))
-                pq2.append(float('nan'))
-                pq3.append(float('nan'))
-                continue
-            
-            # Count
-            count.append(clean_df.__len__())
-
-            # Mean
-            mean.append(clean_df.sum() / clean_df.__len__())
-
-            # Std
-            if clean_df.__len__() == 1:
-                std.append(0.0)
-            else:
-                r = (clean_df - (clean_df.sum() / clean_df.__len__())) ** 2
-                s = (r.sum() / (clean_df.__len__() - 1)) ** 0.5
-                std.append(s)
-
-            # Min, max
-            number_min, number_max = self.get_min_max(clean_df)
-            min.append(number_min)
-            max.append(number_max)
-
-            # Percentiles
-            pq1.append(self.percentile(clean_df, self.pq1))
-            pq2.append(self.percentile(clean_df, self.pq2))
-            pq3.append(self.percentile(clean_df, self.pq3))
-
-        stats_names = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
-        df_count = pd.DataFrame(count, index=index, columns=[stats_names[0]]).transpose()
-        df_mean = pd.DataFrame(mean, index=index, columns=[stats_names[1]]).transpose()
-        df_std = pd.DataFrame(std, index=index, columns=[stats_names[2]]).transpose()
-        df_min = pd.DataFrame(min, index=index, columns=[stats_names[3]]).transpose()
-        df_pq1 = pd.DataFrame(pq1, index=index, columns=[stats_names[4]]).transpose()
-        df_pq2 = pd.DataFrame(pq2, index=index, columns=[stats_names[5]]).transpose()
-        df_pq3 = pd.DataFrame(pq3, index=index, columns=[stats_names[6]]).transpose()
-        df_max = pd.DataFrame(max, index=index, columns=[stats_names[7]]).transpose()
-
-        self.result = pd.concat([df_count, df_mean, df_std, df_min, df_pq1, df_pq2, df_pq3, df_max])
-        self.result = self.result.astype(float).round(6)
+        # Gets features with numeric values as one float matrix (a column per feature)
+        columns, matrix = numeric_matrix(self.df)
+        quantiles, extrema = needed_work(self.stats, self.percentiles)
+        if self.error is None:
+            stats = parallel_column_stats(matrix, quantiles, extrema, self.workers)
+        else:
+            self.accumulator = StreamingStats(columns, k_for_error(self.error))
+            self.accumulator.update(matrix)
+            stats = self.accumulator.stats(quantiles)
+        self.result = stats_table(columns, stats, self.stats)
+
+    def get_grouped_stats(self):
+        codes, groups = group_codes(self.df[self.by])
+        # Rows without a group label are left out, as groupby does
+        labelled = codes >= 0
+        columns, matrix = numeric_matrix(self.df.loc[labelled].drop(columns=self.by))
+        quantiles, extrema = needed_work(self.stats, self.percentiles)
+        stats = grouped_stats(matrix, codes[labelled], len(groups), quantiles, extrema)
+        self.result = grouped_table(groups, columns, stats, self.stats, self.by)
+
+    @property
+    def state(self):
+        """
+        DescribeState of the data (counts, moments, extrema and quantile
+        sketches), built on first access. It can be saved, updated with new
+        rows and merged with states computed elsewhere.
+        """
+        if self.by is not None:
+            raise ValueError("Grouped statistics have no mergeable state")
+        if self._state is None:
+            self._state = DescribeState(k_for_error(self.error) if self.error is not None else DEFAULT_K)
+            self._state.update(self.df)
+        return self._state
 
     def print(self):
         if self.result.empty:
@@ -0,0 +1,251 @@
+import numpy as np
+import pandas as pd
+
+# Order of the rows in the summary table, quantile rows are inserted after 'min'
+BASE_STATS = ['count', 'mean', 'std', 'min']
+
+DEFAULT_PERCENTILES = [0.25, 0.5, 0.75]
+
+
+def check_percentiles(percentiles):
+    """
+    Validates a list of requested quantiles and returns it sorted and without
+    duplicates. Raises ValueError if a value is outside [0, 1].
+    """
+    if percentiles is None:
+        return list(DEFAULT_PERCENTILES)
+    percentiles = sorted(set(float(p) for p in percentiles))
+    if any(not 0 <= p <= 1 for p in percentiles):
+        raise ValueError("Percentiles must be between 0 and 1")
+    return percentiles
+
+
+def percentile_label(percent):
+    """
+    Builds the row label of a quantile the same way pandas does
+    (0.25 -> '25%', 0.025 -> '2.5%').
+    """
+    return f'{percent * 100:g}%'
+
+
+def table_rows(percentiles):
+    """Row labels of the full summary table, in display order."""
+    return BASE_STATS + [percentile_label(p) for p in percentiles] + ['max']
+
+
+def check_stats(stats, percentiles):
+    """
+    Validates a list of requested statistics (row labels such as 'mean' or
+    '25%') and returns it in table order. None means every statistic. Raises
+    ValueError on an unknown name.
+    """
+    rows = table_rows(percentiles)
+    if stats is None:
+        return rows
+    unknown = [name for name in stats if name not in rows]
+    if unknown:
+        raise ValueError(f"Unknown statistics {unknown}, available: {rows}")
+    return [name for name in rows if name in stats]
+
+
+def needed_work(rows, percentiles):
+    """
+    Tells which of the expensive steps the requested rows need: the list of
+    quantiles to compute and whether min/max are needed.
+    """
+    quantiles = [p for p in percentiles if percentile_label(p) in rows]
+    extrema = 'min' in rows or 'max' in rows
+    return quantiles, extrema
+
+
+def numeric_matrix(df: pd.DataFrame):
+    """
+    Gathers every numeric column of a DataFrame into a single float matrix.
+
+    Parameters:
+        df (pd.DataFrame): The dataset to summarize.
+
+    Returns:
+        tuple: (columns, matrix) where `columns` is the list of numeric feature
+        names and `matrix` is a Fortran-ordered float64 array of shape
+        (rows, features), so every column is contiguous in memory. NaN values
+        are kept; the engine masks them out.
+    """
+    df_numeric = df.select_dtypes(include=['float', 'int'])
+    columns = df_numeric.columns.tolist()
+    matrix = np.asfortranarray(df_numeric.to_numpy(dtype=np.float64, copy=True))
+    return columns, matrix
+
+
+def moments(count, total, squared_deviation):
+    """
+    Turns count and sum into mean and sample std arrays. `squared_deviation`
+    receives the means and returns the sums of squared deviations from them.
+    Mean and std are NaN where count is 0; std is 0 where count is 1.
+    """
+    has_values = count > 0
+    mean = np.where(has_values, total / np.where(has_values, count, 1), np.nan)
+    squared = squared_deviation(mean)
+    std = np.where(count > 1, (squared / np.maximum(count - 1, 1)) ** 0.5, 0.0)
+    return mean, np.where(has_values, std, np.nan)
+
+
+def interpolate(sorted_values, start, count, percent):
+    """
+    Reads the quantile `percent` of blocks of sorted values. Block i starts at
+    `start[i]` and holds `count[i]` valid values first; the result
+    interpolates linearly between the two closest ranks (NaN for empty blocks).
+    """
+    count = np.asarray(count, dtype=int)
+    if len(sorted_values) == 0:
+        return np.full(count.shape, np.nan)
+    last = np.maximum(count - 1, 0)
+    k = last * percent
+    f = np.floor(k).astype(int)
+    c = np.minimum(f + 1, last)
+    low = sorted_values[np.minimum(start + f, len(sorted_values) - 1)]
+    high = sorted_values[np.minimum(start + c, len(sorted_values) - 1)]
+    return np.where(count > 0, low + (high - low) * (k - f), np.nan)
+
+
+def column_stats(matrix: np.ndarray, percentiles, extrema=True):
+    """
+    Computes count, mean, sample std, min, max and the requested quantiles of
+    every column of `matrix` with vectorized operations.
+
+    Count, mean and std are masked sums taken in file order (std uses n - 1).
+    When quantiles are requested, each column is sorted exactly once, in place
+    (NaN values are moved to the end by the sort), and min, max and the
+    quantiles are read from the sorted block with linear interpolation between
+    the two closest ranks, the same rule the original `Describe.percentile`
+    used. Without quantiles nothing is sorted: min/max are masked reductions,
+    or skipped when `extrema` is False.
+
+    Parameters:
+        matrix (np.ndarray): Fortran-ordered float matrix of shape
+            (rows, features). It may be sorted in place, pass a copy if the
+            original order matters.
+        percentiles (list[float]): Quantiles to compute, between 0 and 1.
+        extrema (bool): Whether min and max are needed.
+
+    Returns:
+        dict: Maps each statistic name ('count', 'mean', 'std', 'min', 'max'
+        and the quantile labels) to an array with one value per column.
+    """
+    rows, features = matrix.shape
+    missing = np.isnan(matrix)
+    count = rows - missing.sum(axis=0)
+    total = np.where(missing, 0.0, matrix).sum(axis=0)
+    mean, std = moments(count, total, lambda mean: np.where(missing, 0.0, (matrix - mean) ** 2).sum(axis=0))
+    stats = {'count': count.astype(float), 'mean': mean, 'std': std}
+    has_values = count > 0
+
+    if percentiles:
+        del missing
+        matrix.sort(axis=0)
+        # Column-major flat view of the sorted block, column j starts at j * rows
+        flat = matrix.ravel(order='F')
+        start = np.arange(features) * rows
+        stats['min'] = interpolate(flat, start, count, 0.0)
+        stats['max'] = interpolate(flat, start, count, 1.0)
+        for percent in percentiles:
+            stats[percentile_label(percent)] = interpolate(flat, start, count, percent)
+    elif extrema:
+        stats['min'] = np.where(has_values, np.where(missing, np.inf, matrix).min(axis=0, initial=np.inf), np.nan)
+        stats['max'] = np.where(has_values, np.where(missing, -np.inf, matrix).max(axis=0, initial=-np.inf), np.nan)
+
+    return stats
+
+
+def group_codes(labels: pd.Series):
+    """
+    Encodes group labels as integer codes 0..G-1 (groups in sorted order, as
+    pandas groupby does). Rows with a missing label get the code -1.
+
+    Returns:
+        tuple: (codes, groups) with the code of each row and the group labels.
+    """
+    codes, groups = pd.factorize(labels, sort=True)
+    return codes, list(groups)
+
+
+def grouped_stats(matrix: np.ndarray, codes: np.ndarray, n_groups, percentiles, extrema=True):
+    """
+    Computes the Describe statistics of every column for every group in a
+    single pass over the data.
+
+    Count, sum and then the squared deviations from the group means are
+    scatter-added into (group, column) cells with `np.bincount` over the group
+    codes. When quantiles are requested, the rows are reordered once so every
+    group is a contiguous block, and each block is sorted column-wise (every
+    column is sorted once, group by group); min, max and the quantiles are then
+    read from the sorted blocks. Without quantiles, min/max are segment
+    reductions over the same blocks and nothing is sorted.
+
+    Parameters:
+        matrix (np.ndarray): Float matrix of shape (rows, features).
+        codes (np.ndarray): Group code of each row, between 0 and n_groups - 1.
+        n_groups (int): Number of groups.
+        percentiles (list[float]): Quantiles to compute, between 0 and 1.
+        extrema (bool): Whether min and max are needed.
+
+    Returns:
+        dict: Maps each statistic name to an array of shape (groups, features).
+    """
+    rows, features = matrix.shape
+    missing = np.isnan(matrix)
+
+    def scatter_sum(weights):
+        return np.stack([np.bincount(codes, weights=weights[:, column], minlength=n_groups) for column in range(features)], axis=1)
+
+    count = scatter_sum(~missing)
+    total = scatter_sum(np.where(missing, 0.0, matrix))
+    mean, std = moments(count, total, lambda mean: scatter_sum(np.where(missing, 0.0, (matrix - mean[codes]) ** 2)))
+    stats = {'count': count, 'mean': mean, 'std': std}
+
+    if percentiles or extrema:
+        del missing
+        # Rows reordered once so every group is a contiguous block
+        order = np.argsort(codes, kind='stable')
+        grouped = np.asfortranarray(matrix[order])
+        group_size = np.bincount(codes, minlength=n_groups)
+        start = np.concatenate([[0], np.cumsum(group_size)[:-1]])
+    if percentiles:
+        for first, size in zip(start, group_size):
+            grouped[first:first + size].sort(axis=0)
+        # Column-major flat view, cell (group g, column j) starts at j * rows + start[g]
+        flat = grouped.ravel(order='F')
+        cell_start = start[:, np.newaxis] + np.arange(features) * rows
+        stats['min'] = interpolate(flat, cell_start, count, 0.0)
+        stats['max'] = interpolate(flat, cell_start, count, 1.0)
+        for percent in percentiles:
+            stats[percentile_label(percent)] = interpolate(flat, cell_start, count, percent)
+    elif extrema:
+        # fmin / fmax skip NaN values, an all-NaN block gives NaN
+        stats['min'] = np.fmin.reduceat(grouped, start, axis=0)
+        stats['max'] = np.fmax.reduceat(grouped, start, axis=0)
+
+    return stats
+
+
+def stats_table(columns, stats: dict, rows):
+    """
+    Assembles the statistics produced by `column_stats` into the summary table
+    printed by Describe: one row per requested statistic, one column per
+    feature, values rounded to 6 decimals.
+    """
+    data = {name: stats[name] for name in rows}
+    result = pd.DataFrame(data, index=columns, columns=rows).transpose()
+    return result.astype(float).round(6)
+
+
+def grouped_table(groups, columns, stats: dict, rows, by):
+    """
+    Assembles the statistics produced by `grouped_stats` into one table with a
+    (group, statistic) row index and one column per feature, so
+    `result.xs('mean', level=1)` gives the mean of every feature per group.
+    """
+    data = np.stack([stats[name] for name in rows], axis=1).reshape(len(groups) * len(rows), len(columns))
+    index = pd.MultiIndex.from_product([groups, rows], names=[by, None])
+    result = pd.DataFrame(data, index=index, columns=columns)
+    return result.astype(float).round(6)
@@ -0,0 +1,54 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from describe.engine import column_stats
+from utils.shared import SharedArray, worker_count
+
+# Below this many values the process startup costs more than it saves
+PARALLEL_MIN_VALUES = 2_000_000
+
+
+def column_block_stats(spec, start, stop, percentiles, extrema):
+    """
+    Worker task: maps the shared matrix and computes the statistics of the
+    columns [start, stop). The columns are sorted in place in shared memory;
+    every worker owns a disjoint block of columns.
+    """
+    shm, matrix = SharedArray.attach(spec)
+    try:
+        return column_stats(matrix[:, start:stop], percentiles, extrema)
+    finally:
+        del matrix
+        shm.close()
+
+
+def parallel_column_stats(matrix: np.ndarray, percentiles, extrema=True, workers=1):
+    """
+    Same as describe.engine.column_stats, with the columns split across a pool
+    of worker processes.
+
+    The matrix is copied once into shared memory (Fortran order, so every
+    column block is contiguous) and each worker maps it by name, instead of
+    receiving a pickled DataFrame. Inputs under PARALLEL_MIN_VALUES values, a
+    single column or a single worker run serially in this process.
+
+    Parameters:
+        matrix (np.ndarray): Float matrix of shape (rows, features).
+        percentiles (list[float]): Quantiles to compute, between 0 and 1.
+        extrema (bool): Whether min and max are needed.
+        workers (int): Number of processes, 0 for one per available core.
+
+    Returns:
+        dict: Maps each statistic name to an array with one value per column.
+    """
+    rows, features = matrix.shape
+    workers = worker_count(workers, features)
+    if workers == 1 or matrix.size < PARALLEL_MIN_VALUES:
+        return column_stats(matrix, percentiles, extrema)
+
+    bounds = np.linspace(0, features, workers + 1).astype(int)
+    with SharedArray(np.asfortranarray(matrix)) as shared:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(column_block_stats, shared.spec, start, stop, percentiles, extrema)
+                       for start, stop in zip(bounds[:-1], bounds[1:])]
+            blocks = [future.result() for future in futures]
+    return {name: np.concatenate([block[name] for block in blocks]) for name in blocks[0]}
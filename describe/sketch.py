@@ -0,0 +1,163 @@
+import numpy as np
+
+# Size of the largest compactor. A sketch holds roughly 3 * k values, and
+# keeps every value (so quantiles are exact) until the first compaction.
+DEFAULT_K = 2048
+
+# Each lower compactor is 2/3 the size of the one above it
+CAPACITY_RATIO = 2 / 3
+
+# Empirical fit of the KLL normalized rank error (99% confidence, single
+# quantile) as a function of k: error = ERROR_SCALE / k ** ERROR_EXPONENT
+ERROR_SCALE = 2.296
+ERROR_EXPONENT = 0.9723
+
+
+def k_for_error(error):
+    """
+    Returns the smallest sketch size whose normalized rank error is at most
+    `error` (e.g. 0.01 means the returned quantile is within 1% of the
+    requested rank).
+    """
+    if not 0 < error < 1:
+        raise ValueError("Rank error must be between 0 and 1")
+    return max(2, int(np.ceil((ERROR_SCALE / error) ** (1 / ERROR_EXPONENT))))
+
+
+def error_for_k(k):
+    """Normalized rank error guaranteed by a sketch of size k."""
+    return ERROR_SCALE / k ** ERROR_EXPONENT
+
+
+class KLLSketch():
+    """
+    Bounded-memory quantile sketch (KLL: Karnin, Lang and Liberty, 2016).
+
+    Values are stored in a stack of compactors. Level h holds values that each
+    stand for 2**h original values. When the sketch grows over its capacity,
+    the lowest full level is sorted and every other value (random offset) is
+    promoted to the level above, halving its size. Memory stays around
+    3 * k values per sketch no matter how many values are added, and the rank
+    error of any quantile shrinks as k grows.
+
+    Sketches built on different parts of the data can be merged; the result is
+    a valid sketch of the union. They can be turned into plain dicts (to_dict /
+    from_dict) to be stored as JSON and merged later.
+
+    Attributes:
+        k (int): Capacity of the top compactor.
+        n (int): Number of values added so far.
+        levels (list[np.ndarray]): Values kept at each level.
+
+    Methods:
+        update(values):
+            Adds an array of values (NaN values are ignored).
+
+        merge(other):
+            Folds another sketch into this one.
+
+        from_error(error):
+            Builds an empty sketch sized for a normalized rank error bound.
+
+        to_dict() / from_dict(data):
+            Serialization to and from JSON-compatible dicts.
+
+        quantile(percents):
+            Returns the estimated quantiles, linearly interpolated between ranks.
+    """
+    def __init__(self, k=DEFAULT_K, seed=None):
+        if k < 2:
+            raise ValueError("Sketch size k must be at least 2")
+        self.k = int(k)
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_error(cls, error, seed=None):
+        return cls(k_for_error(error), seed)
+
+    @property
+    def error(self):
+        return error_for_k(self.k)
+
+    def to_dict(self):
+        return {"k": self.k, "n": self.n, "levels": [items.tolist() for items in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data, seed=None):
+        sketch = cls(data["k"], seed)
+        sketch.n = int(data["n"])
+        sketch.levels = [np.asarray(items, dtype=np.float64) for items in data["levels"]] or [np.empty(0)]
+        return sketch
+
+    def capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * CAPACITY_RATIO ** depth)))
+
+    def size(self):
+        return sum(len(items) for items in self.levels)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.compress()
+
+    def merge(self, other):
+        if other.k != self.k:
+            raise ValueError(f"Cannot merge sketches of different size ({self.k} and {other.k})")
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.compress()
+
+    def compress(self):
+        while self.size() > sum(self.capacity(level) for level in range(len(self.levels))):
+            level = 0
+            while len(self.levels[level]) <= self.capacity(level):
+                level += 1
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[level])
+            # With an odd number of items one of them stays behind
+            kept, items = items[:len(items) % 2], items[len(items) % 2:]
+            promoted = items[self.rng.integers(2)::2]
+            self.levels[level] = kept
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+
+    def quantile(self, percents):
+        """
+        Estimates quantiles of the values added so far.
+
+        Every kept value at level h counts as 2**h consecutive ranks. The
+        quantile at rank (total - 1) * percent is interpolated between the two
+        closest ranks, which is exactly the Describe rule while the sketch has
+        not compacted anything yet.
+
+        Parameters:
+            percents (list[float]): Quantiles to estimate, between 0 and 1.
+
+        Returns:
+            np.ndarray: One estimate per percent, NaN if the sketch is empty.
+        """
+        percents = np.asarray(percents, dtype=np.float64)
+        if self.n == 0:
+            return np.full(len(percents), np.nan)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(values), 2 ** level) for level, values in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        items = items[order]
+        cumulative = np.cumsum(weights[order])
+        total = cumulative[-1]
+        k = (total - 1) * percents
+        f = np.floor(k)
+        c = np.minimum(f + 1, total - 1)
+        low = items[np.searchsorted(cumulative, f, side='right')]
+        high = items[np.searchsorted(cumulative, c, side='right')]
+        return low + (high - low) * (k - f)
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from describe.engine import stats_table, check_stats
+from describe.sketch import DEFAULT_K
+from describe.accumulator import StreamingStats
+from utils.utils import read_chunks, write_json
+
+# Bytes before the end of the described data that are hashed to recognise the
+# file when it is updated (a rewritten file fails the check)
+TAIL_BYTES = 4096
+
+
+def file_fingerprint(file_path, offset):
+    """
+    Hashes the header line and the TAIL_BYTES bytes before `offset`.
+
+    Returns:
+        dict: {"header": ..., "tail": ...} hex digests.
+    """
+    with open(file_path, 'rb') as file:
+        header = file.readline()
+        start = max(0, offset - TAIL_BYTES)
+        file.seek(start)
+        tail = file.read(offset - start)
+    return {
+        "header": hashlib.blake2b(header, digest_size=16).hexdigest(),
+        "tail": hashlib.blake2b(tail, digest_size=16).hexdigest(),
+    }
+
+
+class DescribeState():
+    """
+    Persistent, mergeable state behind the Describe statistics.
+
+    It holds the per-column accumulators (count, mean, M2, min, max and KLL
+    quantile sketches, see describe.accumulator.StreamingStats) plus the number
+    of rows folded in. The table can be rebuilt from the state at any time, so
+    the state can be:
+        - saved to disk (JSON) and loaded back,
+        - updated with new rows only: `update_file` remembers how many bytes of
+          the CSV file were described and reads just what was appended since,
+        - merged with a state computed elsewhere (another shard or machine).
+
+    The numeric columns are the ones numeric in the first block of rows. A
+    column that holds non-numeric values in a later block is left out of the
+    table, as `select_dtypes` would leave it out on the whole file.
+
+    Attributes:
+        k (int): Size of the quantile sketches.
+        accumulator (StreamingStats | None): None until the first rows arrive.
+        excluded (set): Columns found to be non-numeric.
+        rows (int): Number of rows folded into the state.
+        source (dict | None): File described by `update_file`: path, byte
+            offset described so far and fingerprint of the described part.
+
+    Usage Example:
+        state = DescribeState.load("state.json") if os.path.exists("state.json") else DescribeState()
+        state.update_file("dataset_train.csv", 100000)
+        state.save("state.json")
+        print(state.table([0.25, 0.5, 0.75]))
+    """
+    def __init__(self, k=DEFAULT_K):
+        self.k = k
+        self.reset()
+
+    def reset(self):
+        self.accumulator = None
+        self.excluded = set()
+        self.rows = 0
+        self.source = None
+
+    def update(self, chunk: pd.DataFrame):
+        if chunk.empty:
+            return
+        numeric = chunk.select_dtypes(include=['float', 'int']).columns
+        if self.accumulator is None:
+            self.accumulator = StreamingStats(numeric, self.k)
+        columns = self.accumulator.columns
+        self.excluded |= set(columns) - set(numeric)
+        frame = chunk.reindex(columns=columns)
+        if self.excluded:
+            frame = frame.assign(**{column: np.nan for column in self.excluded})
+        self.accumulator.update(frame.to_numpy(dtype=np.float64))
+        self.rows += len(chunk)
+
+    def update_file(self, file_path, chunksize):
+        """
+        Folds into the state the rows of a CSV file that it has not seen yet.
+
+        If the state already described this file and the described part is
+        unchanged (same header, same bytes before the saved offset), only the
+        bytes appended since are read. Otherwise the state is reset and the
+        whole file is described. The file must not be written during the
+        update.
+        """
+        file_path = os.path.abspath(file_path)
+        size = os.path.getsize(file_path)
+        offset = 0
+        if self.source is not None and self.source["path"] == file_path and self.source["offset"] <= size \
+            and file_fingerprint(file_path, self.source["offset"]) == self.source["fingerprint"]:
+            offset = self.source["offset"]
+        elif self.rows:
+            print(f"{file_path} does not extend the described data, describing it from the start")
+            self.reset()
+        for chunk in read_chunks(file_path, chunksize, offset):
+            self.update(chunk)
+        self.source = {"path": file_path, "offset": size, "fingerprint": file_fingerprint(file_path, size)}
+
+    def merge(self, other):
+        """
+        Folds another state into this one. Both must track the same columns.
+        The file tracked by `source` stays the one of this state.
+        """
+        if other.accumulator is None:
+            return
+        if self.accumulator is None:
+            self.accumulator = StreamingStats(other.accumulator.columns, other.k)
+            self.k = other.k
+        self.accumulator.merge(other.accumulator)
+        self.excluded |= other.excluded
+        self.rows += other.rows
+
+    def table(self, percentiles, stats=None):
+        """Builds the Describe table (DataFrame) from the accumulated state."""
+        rows = check_stats(stats, percentiles)
+        if self.accumulator is None:
+            return pd.DataFrame()
+        columns = self.accumulator.columns
+        result = stats_table(columns, self.accumulator.stats(percentiles), rows)
+        return result[[column for column in columns if column not in self.excluded]]
+
+    def to_dict(self):
+        return {
+            "k": self.k,
+            "rows": self.rows,
+            "excluded": sorted(self.excluded),
+            "source": self.source,
+            "accumulator": self.accumulator.to_dict() if self.accumulator is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data["k"])
+        state.rows = data["rows"]
+        state.excluded = set(data["excluded"])
+        state.source = data["source"]
+        if data["accumulator"] is not None:
+            state.accumulator = StreamingStats.from_dict(data["accumulator"])
+        return state
+
+    def save(self, path):
+        write_json(path, self.to_dict())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as jsonfile:
+            return cls.from_dict(json.load(jsonfile))
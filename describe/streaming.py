@@ -0,0 +1,46 @@
+from describe.engine import check_percentiles
+from describe.sketch import DEFAULT_K, k_for_error
+from describe.state import DescribeState
+
+
+class   StreamingDescribe():
+    """
+    Out-of-core counterpart of the Describe class. It consumes an iterable of
+    DataFrame chunks (see utils.utils.read_chunks), so only one chunk is in
+    memory at a time, and produces the same summary table.
+
+    The chunks are folded into a describe.state.DescribeState, which can be
+    passed in to continue from a saved state and is kept in `state`.
+
+    Count, mean, std, min and max are exact. Quantiles come from bounded-memory
+    KLL sketches: they are exact while a column has fewer values than the
+    sketch size and approximate beyond that. Passing `error` sizes the
+    sketches for that normalized rank error instead of the default size.
+
+    Attributes:
+        percentiles (list): Quantiles reported in the table.
+        state (DescribeState): Accumulated statistics.
+        result (DataFrame): A DataFrame containing all computed statistics.
+
+    Usage Example:
+        desc = StreamingDescribe(read_chunks("dataset_train.csv", 100000))
+        desc.print()
+    """
+    def __init__(self, chunks, percentiles=None, error=None, state=None, stats=None):
+        self.percentiles = check_percentiles(percentiles)
+        self.stats = stats
+        if state is None:
+            state = DescribeState(k_for_error(error) if error is not None else DEFAULT_K)
+        self.state = state
+        for chunk in chunks:
+            self.state.update(chunk)
+        self.get_stats()
+
+    def get_stats(self):
+        self.result = self.state.table(self.percentiles, self.stats)
+
+    def print(self):
+        if self.result.empty:
+            print("No numeric values in data")
+        else:
+            print(self.result)
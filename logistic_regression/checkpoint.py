@@ -0,0 +1,174 @@
+import base64
+import json
+import os
+import numpy as np
+from utils.utils import GracefulStop, write_json
+
+# Steps of a batch solver between two checkpoints (logreg_train.py --checkpoint_every)
+CHECKPOINT_EVERY = 1000
+
+
+class Checkpoint():
+    """
+    Training state saved to a JSON file, so an interrupted run can resume.
+
+    For every model (a house, or 'softmax') the file keeps its current theta,
+    the cost of every step run so far (of every epoch, for streaming SGD)
+    and whether its training finished,
+    along with the settings and the training file it was written for: a
+    checkpoint only resumes the same training. Files are written atomically
+    (see utils.utils.write_json), so a kill while writing leaves the
+    previous checkpoint intact.
+
+    The solvers see a checkpoint through a `Tracker` of the models they
+    train (see `tracker`).
+
+    Parameters
+    ----------
+    path : str
+        Path to the checkpoint file.
+    settings : dict
+        Training settings that must match to resume (solver, lr, ...).
+    source : dict
+        Training file, see logistic_regression.warm_start.file_source.
+    every : int
+        Steps of a batch solver between two checkpoints, 0 to only save on
+        termination.
+    """
+    def __init__(self, path, settings:dict, source:dict, every=CHECKPOINT_EVERY):
+        if every < 0:
+            print("checkpoint_every must be a positive number, or 0")
+            exit(1)
+        self.path = path
+        self.settings = settings
+        self.source = source
+        self.every = every
+        # name -> {"theta": list, "costs": str, "done": bool}, the costs being
+        # the base64 of their float64 bytes: exact, and far cheaper to write
+        # again every checkpoint than a JSON list of thousands of floats
+        self.models = {}
+        # Solver specific state (e.g. epoch and random generator of SGD)
+        self.extra = {}
+
+    @classmethod
+    def resume(cls, path, settings:dict, source:dict, every=CHECKPOINT_EVERY):
+        """
+        Loads the checkpoint saved at `path`. Exits if it was written for
+        other settings or another training file.
+        """
+        checkpoint = cls(path, settings, source, every)
+        try:
+            with open(path, 'r') as jsonfile:
+                saved = json.load(jsonfile)
+            checkpoint.models = saved['models']
+            checkpoint.extra = saved['extra']
+        except FileNotFoundError:
+            print(f'Error: couldn´t find the checkpoint {path}')
+            exit(1)
+        except Exception as e:
+            print(f'An exception type {type(e).__name__} has ocurred, please check the checkpoint {path}')
+            exit(1)
+        if saved.get('settings') != settings:
+            print(f'The checkpoint {path} was saved by a training with other settings: {saved.get("settings")}')
+            exit(1)
+        if saved.get('source') != source:
+            print(f'The checkpoint {path} was saved for another training file, or the file changed')
+            exit(1)
+        return checkpoint
+
+    def done(self, name):
+        return self.models.get(name, {}).get('done', False)
+
+    def theta(self, name):
+        """Saved theta of a model, or None."""
+        state = self.models.get(name)
+        return None if state is None else np.array(state['theta'], dtype=np.float64)
+
+    def costs(self, name):
+        costs = self.models.get(name, {}).get('costs', '')
+        return np.frombuffer(base64.b64decode(costs), dtype='<f8').copy()
+
+    def record(self, name, theta, costs, done):
+        costs = base64.b64encode(np.asarray(costs, dtype='<f8').tobytes()).decode('ascii')
+        self.models[name] = {"theta": np.asarray(theta).tolist(), "costs": costs, "done": bool(done)}
+
+    def write(self):
+        write_json(self.path, {"settings": self.settings, "source": self.source,
+                               "models": self.models, "extra": self.extra})
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def tracker(self, names:list, whole=False):
+        return Tracker(self, names, whole)
+
+
+class Tracker():
+    """
+    What a solver sees of a checkpoint: the models it trains, in the order
+    of its theta columns (or a single model whose whole theta matrix is
+    saved, with `whole`, as the softmax one).
+
+    Every step, solvers ask `due(steps)` and, when it is, `save` their state
+    then return early if `stopping()`. The costs saved follow the ones of
+    the checkpoint when training resumed, and those steps count towards
+    max_steps (see `steps_left`). Without a checkpoint (in worker
+    processes), nothing is saved but solvers still stop on termination.
+    """
+    def __init__(self, checkpoint:Checkpoint, names:list, whole=False):
+        self.checkpoint = checkpoint
+        self.names = names
+        self.whole = whole
+        self.prior = [np.zeros(0) if checkpoint is None else checkpoint.costs(name) for name in names]
+
+    def due(self, steps):
+        every = 0 if self.checkpoint is None else self.checkpoint.every
+        return GracefulStop.requested() or (every > 0 and steps % every == 0)
+
+    def stopping(self):
+        return GracefulStop.requested()
+
+    def column(self, column):
+        """Tracker of the model of a single column."""
+        tracker = Tracker(self.checkpoint, [self.names[column]])
+        tracker.prior = [self.prior[column]]
+        return tracker
+
+    def steps_left(self, max_steps):
+        """Steps each model may still run, out of `max_steps` in total."""
+        return np.array([max_steps - len(prior) for prior in self.prior])
+
+    def history(self, column, cost):
+        """Costs of a model: the ones saved before the run resumed, then `cost`."""
+        return np.concatenate([self.prior[column], cost])
+
+    def save(self, theta, cost, steps, done=False):
+        """
+        Saves the state of the models and writes the checkpoint.
+
+        Parameters
+        ----------
+        theta : np.ndarray
+            Theta of a single model (features + 1,), or a (features + 1, K)
+            matrix, one column per model (or the whole matrix of the model).
+        cost : np.ndarray
+            Costs of the steps run, shape (steps,) or (steps, K).
+        steps : int | np.ndarray
+            Steps run by every model.
+        done : bool | np.ndarray
+            Whether every model finished.
+        """
+        if self.checkpoint is None:
+            return
+        cost = np.asarray(cost)
+        if self.whole:
+            self.checkpoint.record(self.names[0], theta, self.history(0, cost[:int(steps)]), done)
+        else:
+            theta = np.asarray(theta).reshape(len(theta), -1)
+            cost = cost.reshape(len(cost), -1)
+            steps = np.broadcast_to(steps, len(self.names))
+            done = np.broadcast_to(done, len(self.names))
+            for k, name in enumerate(self.names):
+                self.checkpoint.record(name, theta[:, k], self.history(k, cost[:steps[k], k]), done[k])
+        self.checkpoint.write()
@@ -0,0 +1,124 @@
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from logistic_regression.descent import SOLVERS, log_loss, sigmoid
+from utils.shared import SharedArray, worker_count
+
+
+def fold_bounds(rows, folds, seed=0):
+    """
+    Fold index arrays, built once: a random permutation of the rows and the
+    (start, stop) bounds of every fold in it. The rows of fold i are
+    order[start:stop] and the others train its models.
+    """
+    if folds < 2 or folds > rows:
+        print(f"The number of folds must be between 2 and the number of rows ({rows})")
+        exit(1)
+    order = np.random.default_rng(seed).permutation(rows)
+    bounds = np.linspace(0, rows, folds + 1).astype(int)
+    return order, list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+def run_fold(x, y, order, start, stop, solver, lr, max_steps, min_step_size):
+    """
+    Trains the one-vs-all model of every house on the rows out of the fold
+    and scores it on the fold.
+
+    Returns:
+        dict: per house, lists of accuracy, log-loss and training seconds,
+            and the multi-class accuracy of the fold (argmax of the houses).
+    """
+    test = order[start:stop]
+    train = np.concatenate([order[:start], order[stop:]])
+    x_train, y_train, x_test, y_test = x[train], y[train], x[test], y[test]
+    houses = y.shape[1]
+    theta = np.empty((x.shape[1], houses))
+    accuracy, loss, seconds = np.empty(houses), np.empty(houses), np.empty(houses)
+    for k in range(houses):
+        begin = time.perf_counter()
+        theta[:, k], _, _ = SOLVERS[solver](x_train, y_train[:, k], lr, max_steps, min_step_size)
+        seconds[k] = time.perf_counter() - begin
+        p = sigmoid(x_test @ theta[:, k])
+        accuracy[k] = np.mean((p >= 0.5) == (y_test[:, k] == 1))
+        loss[k] = log_loss(y_test[:, k], p)
+    overall = np.mean((x_test @ theta).argmax(axis=1) == y_test.argmax(axis=1))
+    return accuracy, loss, seconds, float(overall)
+
+
+def fold_task(specs, start, stop, solver, lr, max_steps, min_step_size):
+    """Worker task: maps the shared matrix, outcomes and fold order and runs a fold."""
+    shms, arrays = zip(*[SharedArray.attach(spec) for spec in specs])
+    try:
+        return run_fold(*arrays, start, stop, solver, lr, max_steps, min_step_size)
+    finally:
+        del arrays
+        for shm in shms:
+            shm.close()
+
+
+def cross_validate(x: np.ndarray, y: np.ndarray, folds=5, solver='gd', lr=0.01, max_steps=15000, min_step_size=0.00005, jobs=0, seed=0):
+    """
+    K-fold cross-validation of the one-vs-all models.
+
+    The fold indices are built once and the standardized design matrix,
+    the outcomes and the fold order are placed once in shared memory: the
+    folds run in parallel worker processes that map them, without copying
+    nor standardizing the data again.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Standardized design matrix of shape (n, features + 1).
+    y : np.ndarray
+        One-vs-all outcomes of shape (n, K).
+    folds : int
+        Number of folds.
+    solver, lr, max_steps, min_step_size :
+        Training of every model, as in `Model.train`.
+    jobs : int
+        Worker processes, 0 for one per available core.
+    seed : int
+        Seed of the assignment of the rows to the folds.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        Accuracy, log-loss and training seconds of shape (folds, K), and the
+        multi-class accuracy of every fold.
+    """
+    if lr <= 0 or max_steps <= 0 or min_step_size <= 0:
+        print("Learning rate, max_steps and min_step_size must be positive numbers")
+        exit(1)
+    order, bounds = fold_bounds(len(x), folds, seed)
+    workers = worker_count(jobs, folds)
+    if workers == 1:
+        results = [run_fold(x, y, order, start, stop, solver, lr, max_steps, min_step_size) for start, stop in bounds]
+    else:
+        shared = [SharedArray(array) for array in (x, y, order)]
+        try:
+            specs = [array.spec for array in shared]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(fold_task, specs, start, stop, solver, lr, max_steps, min_step_size)
+                           for start, stop in bounds]
+                results = [future.result() for future in futures]
+        finally:
+            for array in shared:
+                array.close()
+    accuracy, loss, seconds, overall = zip(*results)
+    return np.array(accuracy), np.array(loss), np.array(seconds), np.array(overall)
+
+
+def summary(houses:list, accuracy, loss, seconds, overall):
+    """Mean and standard deviation across the folds of every metric, per house."""
+    rows = []
+    for k, house in enumerate(houses):
+        rows.append({"house": house,
+                     "accuracy_mean": accuracy[:, k].mean(), "accuracy_std": accuracy[:, k].std(),
+                     "log_loss_mean": loss[:, k].mean(), "log_loss_std": loss[:, k].std(),
+                     "seconds_mean": seconds[:, k].mean(), "seconds_std": seconds[:, k].std()})
+    rows.append({"house": "all (argmax)",
+                 "accuracy_mean": overall.mean(), "accuracy_std": overall.std(),
+                 "log_loss_mean": loss.mean(axis=1).mean(), "log_loss_std": loss.mean(axis=1).std(),
+                 "seconds_mean": seconds.sum(axis=1).mean(), "seconds_std": seconds.sum(axis=1).std()})
+    return pd.DataFrame(rows)
@@ -0,0 +1,445 @@
+import numpy as np
+from collections import deque
+
+# Small constant added to sigmoid outputs when computing log-loss
+# to avoid evaluating log(0), which tends to −∞ and breaks training.
+eps = 1e-15
+
+# L-BFGS: number of (step, gradient change) pairs kept. Newton and L-BFGS:
+# sufficient decrease constant of the line search and smallest step length tried
+LBFGS_MEMORY = 10
+ARMIJO = 1e-4
+MIN_LINE_STEP = 1e-10
+
+
+def design_matrix(features: np.ndarray):
+    """
+    Builds the contiguous design matrix of the model: a column of ones (for
+    theta_0) followed by the standardized features, one row per sample.
+    """
+    x = np.empty((features.shape[0], features.shape[1] + 1), dtype=np.float64)
+    x[:, 0] = 1
+    x[:, 1:] = features
+    return x
+
+
+def initial_theta(theta, features, models):
+    """
+    Starting parameters of the kernels below, one row per model: zeros, or a
+    copy of `theta` given as (features,) or (features, models).
+    """
+    if theta is None:
+        return np.zeros((models, features))
+    return np.array(theta, dtype=np.float64).reshape(features, models).T.copy()
+
+
+class EarlyStopping():
+    """
+    Held-out rows of an early stopping on the validation loss, for
+    `gradient_descent`.
+
+    Every time the costs are evaluated, the log-loss of each model on these
+    rows is compared with its best one so far. A model that has not improved
+    for `patience` evaluations in a row stops, with the parameters of its
+    best validation loss.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Design matrix of the validation rows.
+    y : np.ndarray
+        Their outcomes, shape (n,) or (n, K) as the training ones.
+    patience : int
+        Evaluations without improvement before stopping.
+    """
+    def __init__(self, x: np.ndarray, y: np.ndarray, patience: int):
+        self.x = x
+        self.y = y.reshape(len(y), -1)
+        self.patience = patience
+
+    def column(self, column):
+        """Early stopping of the model of a single column of the outcomes."""
+        return EarlyStopping(self.x, self.y[:, column], self.patience)
+
+    def loss(self, theta: np.ndarray):
+        """Validation log-loss of every row of a (K, features + 1) theta."""
+        return log_loss(self.y, sigmoid(self.x @ theta.T))
+
+
+def gradient_descent(x: np.ndarray, y: np.ndarray, lr, max_steps, min_step_size, theta=None, checkpoint=None, cost_every=1, early_stopping=None):
+    """
+    Batch gradient descent of the log-loss, on NumPy arrays only.
+
+    Every step computes z = X @ theta, the numerically stable sigmoid, the
+    log-loss and the gradient X.T @ (sigmoid - y) / n. All the per-row
+    work goes to buffers allocated once, so no array nor pandas object is
+    created per step. Theta starts at zero (or at the given `theta`) and the
+    descent stops before applying an update when every parameter would move
+    less than `min_step_size`.
+
+    The log-loss is only needed for the cost history, so it is only
+    evaluated every `cost_every` steps, saving a log and three passes over
+    the rows on the others. It is also the only time the validation loss of
+    `early_stopping` is checked.
+
+    `y` may also hold one column per one-vs-rest model: theta is then a
+    (features + 1) x K matrix and all the models update from the same matrix
+    products every step. Each column stops on its own, exactly as if it was
+    trained alone: once converged it is frozen while the others go on.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Design matrix of shape (n, features + 1), see `design_matrix`.
+    y : np.ndarray
+        Binary outcome (0. or 1.) of each row, shape (n,) or (n, K).
+    lr : float
+        Learning rate.
+    max_steps : int
+        Maximum number of steps.
+    min_step_size : float
+        Minimum absolute update size for early stopping.
+    theta : np.ndarray, optional
+        Starting parameters, shaped as the returned theta (warm start).
+    checkpoint : logistic_regression.checkpoint.Tracker, optional
+        Receives the state of the descent every `checkpoint.every` steps,
+        and stops it early (after saving) on SIGINT / SIGTERM.
+    cost_every : int
+        Steps between two evaluations of the cost, 0 to never evaluate it.
+    early_stopping : EarlyStopping, optional
+        Also stop each model when its validation loss stops improving. Every
+        model then returns the parameters of its best validation loss,
+        whatever made it stop.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray]
+        The trained theta, the cost of every step (one column per model, NaN
+        on the steps it was not evaluated) and the number of steps each
+        model ran. Costs past a model's number of steps are meaningless.
+    """
+    n, m = x.shape
+    # Every model is a row of the buffers below, so each of them is
+    # contiguous and reduced like a single vector
+    single = y.ndim == 1
+    y = np.ascontiguousarray(np.atleast_2d(y.T))
+    k = y.shape[0]
+    xt = np.ascontiguousarray(x.T)
+    theta = initial_theta(theta, m, k)
+    theta_new = np.empty((k, m))
+    gradient = np.empty((k, m))
+    z = np.empty((k, n))
+    numerator = np.empty((k, n))
+    denominator = np.empty((k, n))
+    sigmoid = np.empty((k, n))
+    loss = np.empty((k, n))
+    # y * sigmoid + (1 - y) * (1 - sigmoid), exactly, as sigmoid * sign + offset
+    sign = 2 * y - 1
+    offset = 1 - y
+    cost = np.full((max_steps, k), np.nan)
+    steps = np.full(k, max_steps)
+    active = np.ones(k, dtype=bool)
+    if early_stopping is not None:
+        best_loss = np.full(k, np.inf)
+        best_theta = theta.copy()
+        waited = np.zeros(k, dtype=int)
+
+    def keep_best(models):
+        # Models that stop for another reason than their patience also end
+        # with their best parameters, their current ones included
+        validation = early_stopping.loss(theta)
+        improved = models & (validation < best_loss)
+        best_theta[improved] = theta[improved]
+        theta[models] = best_theta[models]
+
+    interrupted = False
+    for step in range(max_steps):
+        evaluate = cost_every > 0 and step % cost_every == 0
+        np.dot(theta, xt, out=z)
+        # sigmoid = 1 / (1 + exp(-z)) if z >= 0 else exp(z) / (1 + exp(z)):
+        # the numerator is exp(min(z, 0)) and the denominator 1 + exp(-|z|),
+        # so exp never overflows
+        np.minimum(z, 0, out=numerator)
+        np.exp(numerator, out=numerator)
+        np.abs(z, out=denominator)
+        np.negative(denominator, out=denominator)
+        np.exp(denominator, out=denominator)
+        np.add(denominator, 1, out=denominator)
+        np.divide(numerator, denominator, out=sigmoid)
+
+        if evaluate:
+            # log-loss: -log(sigmoid + eps) for the positive rows, -log(1 - sigmoid + eps) otherwise
+            np.multiply(sigmoid, sign, out=loss)
+            np.add(loss, offset, out=loss)
+            np.add(loss, eps, out=loss)
+            np.log(loss, out=loss)
+            cost[step] = -loss.sum(axis=1) / n
+
+        if evaluate and early_stopping is not None:
+            validation = early_stopping.loss(theta)
+            improved = validation < best_loss
+            best_loss[improved] = validation[improved]
+            best_theta[improved] = theta[improved]
+            waited = np.where(improved, 0, waited + 1)
+            stopped = active & (waited > early_stopping.patience)
+            theta[stopped] = best_theta[stopped]
+            steps[stopped] = step + 1
+            active &= ~stopped
+            if not active.any():
+                break
+
+        np.subtract(sigmoid, y, out=sigmoid)
+        np.dot(sigmoid, x, out=gradient)
+        np.divide(gradient, n, out=gradient)
+        np.multiply(gradient, lr, out=theta_new)
+        np.subtract(theta, theta_new, out=theta_new)
+        converged = active & np.all(np.abs(theta_new - theta) < min_step_size, axis=1)
+        steps[converged] = step + 1
+        if early_stopping is not None and converged.any():
+            keep_best(converged)
+        active &= ~converged
+        if not active.any():
+            break
+        theta[active] = theta_new[active]
+        if checkpoint is not None and checkpoint.due(step + 1):
+            run = np.where(active, step + 1, steps)
+            checkpoint.save(theta.T, cost, run, ~active)
+            if checkpoint.stopping():
+                steps = run
+                interrupted = True
+                break
+    if early_stopping is not None and active.any() and not interrupted:
+        keep_best(active)
+    if single:
+        return theta[0], cost[:, 0], steps[0]
+    return theta.T, cost, steps
+
+
+def softmax_gradient_descent(x: np.ndarray, y: np.ndarray, lr, max_steps, min_step_size, theta=None, checkpoint=None, cost_every=1):
+    """
+    Batch gradient descent of the softmax (multinomial) cross-entropy.
+
+    Unlike one-vs-rest, the K classes share a single normalized probability
+    per row: p = softmax(X @ theta), with the row maximum subtracted before
+    exponentiating so exp never overflows. The gradient is
+    X.T @ (p - y) / n. The descent stops before applying an update when
+    every parameter would move less than `min_step_size`.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Design matrix of shape (n, features + 1), see `design_matrix`.
+    y : np.ndarray
+        One-hot classes, shape (n, K).
+    lr, max_steps, min_step_size, theta, checkpoint, cost_every :
+        As in `gradient_descent`.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        The trained (features + 1) x K theta and the cost of every step run
+        (NaN on the steps it was not evaluated).
+    """
+    n, m = x.shape
+    # Classes are rows of the buffers: the per-row reductions over the
+    # classes become elementwise operations between contiguous rows
+    y = np.ascontiguousarray(y.T)
+    k = y.shape[0]
+    xt = np.ascontiguousarray(x.T)
+    theta = initial_theta(theta, m, k)
+    theta_new = np.empty((k, m))
+    gradient = np.empty((k, m))
+    p = np.empty((k, n))
+    total = np.empty(n)
+    likelihood = np.empty((k, n))
+    cost = np.full(max_steps, np.nan)
+    steps = max_steps
+    for step in range(max_steps):
+        np.dot(theta, xt, out=p)
+        np.max(p, axis=0, out=total)
+        np.subtract(p, total, out=p)
+        np.exp(p, out=p)
+        np.sum(p, axis=0, out=total)
+        np.divide(p, total, out=p)
+
+        if cost_every > 0 and step % cost_every == 0:
+            # cross-entropy: -log(p + eps) of the true class of each row
+            np.multiply(p, y, out=likelihood)
+            np.sum(likelihood, axis=0, out=total)
+            np.add(total, eps, out=total)
+            np.log(total, out=total)
+            cost[step] = -total.sum() / n
+
+        np.subtract(p, y, out=p)
+        np.dot(p, x, out=gradient)
+        np.divide(gradient, n, out=gradient)
+        np.multiply(gradient, lr, out=theta_new)
+        np.subtract(theta, theta_new, out=theta_new)
+        if np.all(np.abs(theta_new - theta) < min_step_size):
+            steps = step + 1
+            break
+        theta, theta_new = theta_new, theta
+        if checkpoint is not None and checkpoint.due(step + 1):
+            checkpoint.save(theta.T, cost, step + 1)
+            if checkpoint.stopping():
+                steps = step + 1
+                break
+    return theta.T, cost[:steps]
+
+
+def sigmoid(z: np.ndarray):
+    """Numerically stable sigmoid: exp is only evaluated on -|z|."""
+    e = np.exp(-np.abs(z))
+    return np.where(z >= 0, 1, e) / (1 + e)
+
+
+def log_loss(y: np.ndarray, p: np.ndarray):
+    """
+    Mean log-loss of the probabilities `p`, with `eps` to avoid log(0). With
+    one column per model, returns the log-loss of every column.
+    """
+    return -(y * np.log(p + eps) + (1 - y) * np.log(1 - p + eps)).sum(axis=0) / len(y)
+
+
+def objective(x: np.ndarray, y: np.ndarray, theta: np.ndarray):
+    """
+    Log-loss, gradient and probabilities of a single model at `theta`, the
+    log-loss as log(1 + exp(z)) - y * z, without rounding to eps.
+    """
+    n = len(x)
+    z = x @ theta
+    p = sigmoid(z)
+    return np.logaddexp(0, z).sum() / n - y @ z / n, x.T @ (p - y) / n, p
+
+
+def line_search(x: np.ndarray, y: np.ndarray, theta: np.ndarray, direction: np.ndarray, loss, slope):
+    """
+    Backtracking line search with the Armijo condition: the step length
+    starts at 1 and is halved until the log-loss decreases enough along
+    `direction` (`slope` being the gradient @ direction).
+
+    Returns:
+        tuple | None: (theta, loss, gradient, p) of the accepted step, or
+            None if no step length down to MIN_LINE_STEP decreases the loss.
+    """
+    t = 1.0
+    while t >= MIN_LINE_STEP:
+        theta_new = theta + t * direction
+        loss_new, gradient_new, p_new = objective(x, y, theta_new)
+        if loss_new <= loss + ARMIJO * t * slope:
+            return theta_new, loss_new, gradient_new, p_new
+        t /= 2
+    return None
+
+
+def newton(x: np.ndarray, y: np.ndarray, lr, max_steps, min_step_size, theta=None, checkpoint=None, cost_every=1):
+    """
+    Newton's method on the log-loss (iteratively reweighted least squares).
+
+    Every step solves H @ delta = g, with the gradient g = X.T @ (p - y) / n
+    and the Hessian H = X.T @ diag(p * (1 - p)) @ X / n, and moves theta
+    along -delta. The step length comes from the backtracking line search of
+    `lbfgs`, so a start far from the optimum (e.g. a warm start from other
+    data) can not overshoot; near the optimum the full Newton step is taken.
+    With a handful of features the Hessian is tiny and the descent converges
+    in a few dozen steps. It stops after the first update where every
+    parameter moved less than `min_step_size`, or when no step decreases the
+    loss. `lr` is not used.
+
+    Parameters and returns are the ones of `gradient_descent`, for a single
+    outcome column and without early_stopping.
+    """
+    n, m = x.shape
+    theta = np.zeros(m) if theta is None else np.array(theta, dtype=np.float64)
+    loss, gradient, p = objective(x, y, theta)
+    cost = np.full(max_steps, np.nan)
+    for step in range(max_steps):
+        if cost_every > 0 and step % cost_every == 0:
+            cost[step] = log_loss(y, p)
+        hessian = (x.T * (p * (1 - p))) @ x / n
+        try:
+            delta = np.linalg.solve(hessian, gradient)
+        except np.linalg.LinAlgError:
+            # Singular Hessian (saturated probabilities): least squares step
+            delta = np.linalg.lstsq(hessian, gradient, rcond=None)[0]
+        direction = -delta
+        slope = gradient @ direction
+        if slope >= 0:
+            direction, slope = -gradient, -(gradient @ gradient)
+        accepted = line_search(x, y, theta, direction, loss, slope)
+        if accepted is None:
+            return theta, cost, step + 1
+        theta_new, loss, gradient, p = accepted
+        moved = theta_new - theta
+        theta = theta_new
+        if np.all(np.abs(moved) < min_step_size):
+            return theta, cost, step + 1
+        if checkpoint is not None and checkpoint.due(step + 1):
+            checkpoint.save(theta, cost, step + 1)
+            if checkpoint.stopping():
+                return theta, cost, step + 1
+    return theta, cost, max_steps
+
+
+def lbfgs(x: np.ndarray, y: np.ndarray, lr, max_steps, min_step_size, theta=None, checkpoint=None, cost_every=1, memory=LBFGS_MEMORY):
+    """
+    Limited-memory BFGS on the log-loss.
+
+    The search direction comes from the two-loop recursion over the last
+    `memory` (step, gradient change) pairs, and the step length from a
+    backtracking line search with the Armijo condition, so no learning rate
+    is needed (`lr` is not used). It stops after the first update where
+    every parameter moved less than `min_step_size`, or when no step along
+    the search direction decreases the loss. A resumed descent
+    (`theta` from a checkpoint) starts with an empty memory.
+
+    Parameters and returns are the ones of `gradient_descent`, for a single
+    outcome column and without early_stopping.
+    """
+    n, m = x.shape
+    theta = np.zeros(m) if theta is None else np.array(theta, dtype=np.float64)
+    loss, gradient, p = objective(x, y, theta)
+    history = deque(maxlen=memory)
+    cost = np.full(max_steps, np.nan)
+    for step in range(max_steps):
+        if cost_every > 0 and step % cost_every == 0:
+            cost[step] = log_loss(y, p)
+        direction = -gradient
+        alphas = []
+        for s, g, rho in reversed(history):
+            alpha = rho * (s @ direction)
+            direction -= alpha * g
+            alphas.append(alpha)
+        if history:
+            s, g, _ = history[-1]
+            direction *= (s @ g) / (g @ g)
+        for (s, g, rho), alpha in zip(history, reversed(alphas)):
+            direction += s * (alpha - rho * (g @ direction))
+        slope = gradient @ direction
+        if slope >= 0:
+            direction, slope = -gradient, -(gradient @ gradient)
+
+        accepted = line_search(x, y, theta, direction, loss, slope)
+        if accepted is None:
+            # No step length decreases the loss: stop instead of going uphill
+            return theta, cost, step + 1
+        theta_new, loss_new, gradient_new, p_new = accepted
+        s, g = theta_new - theta, gradient_new - gradient
+        if s @ g > 0:
+            history.append((s, g, 1 / (s @ g)))
+        theta, loss, gradient, p = theta_new, loss_new, gradient_new, p_new
+        if np.all(np.abs(s) < min_step_size):
+            return theta, cost, step + 1
+        if checkpoint is not None and checkpoint.due(step + 1):
+            checkpoint.save(theta, cost, step + 1)
+            if checkpoint.stopping():
+                return theta, cost, step + 1
+    return theta, cost, max_steps
+
+
+# Optimizers of Model.train / logreg_train.py --solver
+SOLVERS = {
+    'gd': gradient_descent,
+    'newton': newton,
+    'lbfgs': lbfgs,
+}
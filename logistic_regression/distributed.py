@@ -0,0 +1,146 @@
+import os
+import numpy as np
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Client, Listener
+from logistic_regression.descent import eps, gradient_descent, sigmoid
+from utils.shared import worker_count
+
+
+def serve_shard(connection):
+    """
+    Worker loop: receives its shard of rows (design matrix and outcomes) once,
+    then answers every (theta, evaluate) sent by the coordinator with the
+    partial sums of the gradient and, if `evaluate`, of the log-loss over
+    the shard (None otherwise), until it receives None.
+    """
+    try:
+        x, y = connection.recv()
+        while True:
+            message = connection.recv()
+            if message is None:
+                break
+            theta, evaluate = message
+            p = sigmoid(x @ theta)
+            loss = -(y * np.log(p + eps) + (1 - y) * np.log(1 - p + eps)).sum(axis=0) if evaluate else None
+            connection.send((x.T @ (p - y), loss))
+    finally:
+        connection.close()
+
+
+def serve_shard_over_socket(address, authkey):
+    serve_shard(Client(address, authkey=authkey))
+
+
+def start_pipe_workers(count):
+    """Starts `count` worker processes, each connected by a multiprocessing pipe."""
+    connections, processes = [], []
+    for _ in range(count):
+        connection, worker_connection = Pipe()
+        process = Process(target=serve_shard, args=(worker_connection,), daemon=True)
+        process.start()
+        worker_connection.close()
+        connections.append(connection)
+        processes.append(process)
+    return connections, processes
+
+
+def start_socket_workers(count):
+    """
+    Starts `count` worker processes that connect back to the coordinator
+    through a local TCP socket (authenticated with a random key), as workers
+    on other nodes would.
+    """
+    authkey = os.urandom(16)
+    with Listener(('localhost', 0), authkey=authkey) as listener:
+        processes = [Process(target=serve_shard_over_socket, args=(listener.address, authkey), daemon=True)
+                     for _ in range(count)]
+        for process in processes:
+            process.start()
+        connections = [listener.accept() for _ in processes]
+    return connections, processes
+
+
+# How the coordinator reaches its workers (logreg_train.py --transport)
+TRANSPORTS = {
+    'pipe': start_pipe_workers,
+    'socket': start_socket_workers,
+}
+
+
+def data_parallel_descent(x: np.ndarray, y: np.ndarray, lr, max_steps, min_step_size, shards=1, transport='pipe', theta=None, checkpoint=None, cost_every=1):
+    """
+    Batch gradient descent with the rows split across worker processes.
+
+    Every worker holds a contiguous shard of the rows. At each step the
+    coordinator broadcasts theta, every worker returns the partial sums of
+    the gradient X.T @ (sigmoid - y) and of the log-loss over its shard, and
+    the coordinator reduces them and updates theta. Only theta and the
+    partial sums travel per step, so the transport ('pipe' or 'socket', see
+    TRANSPORTS) can stand in for workers on other nodes. The stopping rule is
+    the one of logistic_regression.descent.gradient_descent, one column per
+    model included. With a single worker, that function runs in this process.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Design matrix of shape (n, features + 1).
+    y : np.ndarray
+        Binary outcome of each row, shape (n,) or (n, K).
+    lr, max_steps, min_step_size, theta, checkpoint, cost_every :
+        As in gradient_descent.
+    shards : int
+        Number of worker processes, 0 for one per available core.
+    transport : str
+        Key of TRANSPORTS.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray]
+        As gradient_descent: theta, cost of every step and steps run.
+    """
+    n, m = x.shape
+    workers = worker_count(shards, n)
+    if workers == 1:
+        return gradient_descent(x, y, lr, max_steps, min_step_size, theta, checkpoint, cost_every)
+
+    models = y.shape[1:]
+    theta = np.zeros((m,) + models) if theta is None else np.array(theta, dtype=np.float64)
+    cost = np.full((max_steps,) + models, np.nan)
+    steps = np.full(models, max_steps)
+    active = np.ones(models, dtype=bool)
+    connections, processes = TRANSPORTS[transport](workers)
+    try:
+        bounds = np.linspace(0, n, workers + 1).astype(int)
+        for connection, start, stop in zip(connections, bounds[:-1], bounds[1:]):
+            connection.send((x[start:stop], y[start:stop]))
+        for step in range(max_steps):
+            evaluate = cost_every > 0 and step % cost_every == 0
+            for connection in connections:
+                connection.send((theta, evaluate))
+            partials = [connection.recv() for connection in connections]
+            gradient = sum(partial for partial, _ in partials) / n
+            if evaluate:
+                cost[step] = sum(loss for _, loss in partials) / n
+            theta_new = theta - lr * gradient
+            converged = active & np.all(np.abs(theta_new - theta) < min_step_size, axis=0)
+            steps[converged] = step + 1
+            active &= ~converged
+            if not active.any():
+                break
+            theta = np.where(active, theta_new, theta)
+            if checkpoint is not None and checkpoint.due(step + 1):
+                run = np.where(active, step + 1, steps)
+                checkpoint.save(theta, cost, run, ~active)
+                if checkpoint.stopping():
+                    steps = run
+                    break
+    finally:
+        for connection in connections:
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+            connection.close()
+        for process in processes:
+            process.join()
+    return theta, cost, steps
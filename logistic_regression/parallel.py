@@ -0,0 +1,92 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from logistic_regression.checkpoint import Tracker
+from logistic_regression.descent import gradient_descent, SOLVERS
+from utils.shared import SharedArray, worker_count
+from utils.utils import GracefulStop
+
+
+def house_descent(x_spec, y_spec, column, solver, lr, max_steps, min_step_size, theta=None, stoppable=False, options=None):
+    """
+    Worker task: maps the shared design matrix and outcomes and trains the
+    one-vs-all model of a single house (column of the outcomes) with one of
+    the SOLVERS, with the keyword arguments `options`. With `stoppable`, the
+    descent returns early when the parent process is asked to terminate
+    (see utils.utils.GracefulStop).
+    """
+    x_shm, x = SharedArray.attach(x_spec)
+    y_shm, y = SharedArray.attach(y_spec)
+    try:
+        checkpoint = Tracker(None, [column]) if stoppable else None
+        theta, cost, steps = SOLVERS[solver](x, y[:, column], lr, max_steps, min_step_size, theta, checkpoint, **(options or {}))
+        return theta, cost[:steps]
+    finally:
+        del x, y
+        x_shm.close()
+        y_shm.close()
+
+
+def parallel_descent(x: np.ndarray, y: np.ndarray, lr, max_steps, min_step_size, jobs=1, solver='gd', theta=None, checkpoint=None,
+                     cost_every=1, early_stopping=None):
+    """
+    Trains the one-vs-all models of all the houses, one per worker process.
+
+    The design matrix and the outcomes are copied once into shared memory
+    and every worker maps them by name instead of receiving a pickled copy.
+    With a single worker (jobs=1, one house or one available core), the
+    models are trained in this process, as a single matrix problem for
+    gradient descent (see logistic_regression.descent.gradient_descent).
+    Both ways give the same weights.
+
+    With a `checkpoint`, worker processes do not save their progress: each
+    house is saved when its worker returns, after converging or because the
+    training was asked to terminate.
+
+    Parameters:
+        x (np.ndarray): Design matrix of shape (n, features + 1).
+        y (np.ndarray): Binary outcomes of shape (n, K), one column per house.
+        lr, max_steps, min_step_size: As in gradient_descent.
+        jobs (int): Number of processes, 0 for one per available core.
+        solver (str): Name of the optimizer, one of SOLVERS.
+        theta (np.ndarray | None): Starting theta matrix (warm start).
+        checkpoint (Tracker | None): Checkpoint of the houses, see
+            logistic_regression.checkpoint.
+        cost_every (int): Steps between two evaluations of the cost.
+        early_stopping (EarlyStopping | None): Validation rows of all the
+            houses, gradient descent only.
+
+    Returns:
+        tuple: (theta, costs). Theta matrix of shape (features + 1, K) and the
+            cost of every step run by each house.
+    """
+    houses = y.shape[1]
+    workers = worker_count(jobs, houses)
+    # A resumed training may have run more steps for some houses than others
+    limits = np.full(houses, max_steps) if checkpoint is None else checkpoint.steps_left(max_steps)
+    if workers == 1 and solver == 'gd' and np.all(limits == limits[0]):
+        theta, cost, steps = gradient_descent(x, y, lr, int(limits[0]), min_step_size, theta, checkpoint, cost_every, early_stopping)
+        return theta, [cost[:steps[k], k] for k in range(houses)]
+    columns = [None if theta is None else theta[:, k] for k in range(houses)]
+    trackers = [None if checkpoint is None else checkpoint.column(k) for k in range(houses)]
+    options = [{"cost_every": cost_every} if early_stopping is None else
+               {"cost_every": cost_every, "early_stopping": early_stopping.column(k)}
+               for k in range(houses)]
+    if workers == 1:
+        results = [SOLVERS[solver](x, y[:, k], lr, int(limits[k]), min_step_size, columns[k], trackers[k], **options[k])
+                   for k in range(houses)]
+        return np.column_stack([theta for theta, _, _ in results]), [cost[:steps] for _, cost, steps in results]
+
+    initializer, initargs = (None, ()) if checkpoint is None else (GracefulStop.attach, (GracefulStop.share(),))
+    results = [None] * houses
+    with SharedArray(x) as shared_x, SharedArray(y) as shared_y:
+        with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+            futures = {pool.submit(house_descent, shared_x.spec, shared_y.spec, k, solver, lr, int(limits[k]), min_step_size,
+                                   columns[k], checkpoint is not None, options[k]): k
+                       for k in range(houses)}
+            for future in as_completed(futures):
+                k = futures[future]
+                results[k] = future.result()
+                if checkpoint is not None:
+                    theta, cost = results[k]
+                    trackers[k].save(theta, cost, len(cost), not checkpoint.stopping())
+    return np.column_stack([theta for theta, _ in results]), [cost for _, cost in results]
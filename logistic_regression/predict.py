@@ -1,10 +1,95 @@
 import json
+import os
+import shutil
+import tempfile
 import pandas as pd
 import numpy as np
-from utils.utils import standarize
+from concurrent.futures import ProcessPoolExecutor
+from logistic_regression.descent import design_matrix, sigmoid
+from logistic_regression.preprocessing import Scaler
+from utils.shared import available_cpus, worker_count
+from utils.utils import read_chunks, line_shards
 from utils import config
 
-def   Predict(df_predict, jsonpath):
+def read_weights(jsonpath):
+    """
+    Loads and validates the weights.json generated during training.
+
+    weights.json files written before the features were saved in them hold
+    the theta_0..theta_3 of the features of utils/config.py.
+
+    Parameters:
+        jsonpath (str): Path to the JSON file.
+
+    Returns:
+        tuple: (df_weights, features, means, stds). `df_weights` has one row
+            per house and its theta_0..theta_N columns, `features` the N
+            features in their order.
+    """
+    try:
+        with open(jsonpath, 'r') as jsonfile:
+            weights = json.load(jsonfile)
+    except Exception as e:
+        print(f'An exception type {type(e).__name__} has ocurred, please check the json file {jsonpath}')
+        exit(1)
+
+    try:
+        if not isinstance(weights, dict) or not weights:
+            print("JSON contains no houses")
+            exit(1)
+        features = next(iter(weights.values())).get("features", config.features)
+        if not isinstance(features, list) or not features or any(not isinstance(x, str) for x in features):
+            print(f"Invalid value for features: {features}")
+            exit(1)
+        thetas = [f'theta_{i}' for i in range(len(features) + 1)]
+        required = set(thetas) | {"means", "stds"}
+        for house, data in weights.items():
+            if not required.issubset(data):
+                print(f"Missing fields in JSON for {house}")
+                exit(1)
+            if data.get("features", config.features) != features:
+                print(f"The houses of {jsonpath} were trained on different features")
+                exit(1)
+        df_weights = pd.DataFrame.from_dict(weights, orient='index')
+        if df_weights[thetas].isna().any().any() or not all(df_weights[thetas].apply(pd.api.types.is_numeric_dtype)):
+            print("Invalid numeric values in theta fields")
+            exit(1)
+        means = df_weights.iloc[0]['means']
+        stds = df_weights.iloc[0]['stds']
+
+    except Exception as e:
+        print(f'An exception type {type(e).__name__} has ocurred, the data in {jsonpath} could not generate a DataFrame')
+        exit(1)
+
+    if not isinstance(means, (list, tuple)) or not isinstance(stds, (list, tuple)):
+        print("Means/stds must be lists")
+        exit(1)
+    if any(not isinstance(x, (int, float)) for x in means):
+        print(f"Invalid value for mean: {means}")
+        exit(1)
+    if any(not isinstance(x, (int, float)) or x <= 0 for x in stds):
+        print(f"Invalid value for std: {stds}")
+        exit(1)
+    if len(means) != len(features) or len(stds) != len(features):
+        print(f"Means/stds must contain {len(features)} elements")
+        exit(1)
+    return df_weights, features, means, stds
+
+def weight_arrays(weights):
+    """
+    The arrays the houses are scored with, from the result of `read_weights`.
+
+    Returns:
+        tuple: (features, houses, theta, scaler). `houses` is an object
+            array of the house names, `theta` the (features + 1, houses)
+            matrix of their weights and `scaler` the stored standardization.
+    """
+    df_weights, features, means, stds = weights
+    houses = np.array(df_weights.index, dtype=object)
+    theta = df_weights[[f'theta_{i}' for i in range(len(features) + 1)]].to_numpy(dtype=np.float64).T
+    return features, houses, theta, Scaler(means, stds)
+
+def   Predict(df_predict, jsonpath, weights=None, allow_empty=False):
     """
     Predicts the Hogwarts house for each row in a dataset using a trained
     multiclass logistic regression model and weights stored in a JSON file.
@@ -14,25 +99,36 @@ def   Predict(df_predict, jsonpath):
     - Validates the JSON structure and the numeric integrity of the data.
     - Extracts and converts the required features to numeric form.
     - Drops rows with missing or invalid values.
-    - Standardizes the three selected features using the stored means and stds.
-    - Computes the linear term z for each house.
+    - Standardizes the features, all at once, using the stored means and stds.
+    - Computes the linear term z of every house at once, as a single matrix
+      product of the standardized rows and the theta matrix of the houses.
     - Applies a numerically stable sigmoid function to obtain probabilities.
-    - Selects the most probable class for each row.
+    - Selects the most probable class for each row (argmax over the house
+      columns), and maps it to the house names once.
     - Returns a DataFrame aligned to the original index with the predictions.
 
     Parameters
     ----------
     df_predict : pandas.DataFrame
-        Input DataFrame containing at least the three feature columns defined in
-        `config.feature_1`, `config.feature_2`, and `config.feature_3`.
+        Input DataFrame containing at least the feature columns the model was
+        trained on (the "features" of the JSON file, or `config.features`).
         Non-numeric values are coerced to NaN and subsequently dropped.
 
     jsonpath : str
         Path to the JSON file generated during training. The file must contain,
         for each house:
-            - "theta_0", "theta_1", "theta_2", "theta_3"
-            - "means": list of 3 numerical means
-            - "stds": list of 3 numerical std deviations (positive numbers)
+            - "theta_0", "theta_1", ... one per feature after the intercept
+            - "means": list of numerical means, one per feature
+            - "stds": list of numerical std deviations (positive numbers)
+            - "features": list of the feature names (optional, see
+              `read_weights`)
+
+    weights : tuple, optional
+        The result of `read_weights(jsonpath)`, when it is already loaded.
+
+    allow_empty : bool
+        Return only `None` predictions instead of exiting when no row is
+        complete (e.g. for a chunk of a larger file).
 
     Returns
     -------
@@ -48,13 +144,12 @@ def   Predict(df_predict, jsonpath):
     - JSON file not found, unreadable, or malformed.
     - Missing required fields (θ values, means, stds).
     - Invalid numeric values in θ parameters.
-    - `means` or `stds` not being lists/tuples of length 3.
+    - `means` or `stds` not being lists/tuples of one value per feature.
     - Non-numeric or negative standard deviations.
     - Input DataFrame lacking required feature columns.
     - All rows becoming NaN after numeric conversion.
-    - Overflow when computing the exponential part of the sigmoid function.
+    - Overflow when computing the linear terms.
     - Invalid probability values (NaN or ±inf).
-    - Incorrect or missing target_label during final classification.
 
     Notes
     -----
@@ -63,100 +158,151 @@ def   Predict(df_predict, jsonpath):
         - For z < 0:   exp(z) / (1 + exp(z))
       to prevent overflow when z is large in magnitude.
 
-    - The output probabilities are compared across houses using `idxmax` to
-      determine the final prediction.
+    - The output probabilities are compared across houses with a NumPy
+      argmax: ties go to the first house of the JSON file.
 
     - The returned DataFrame preserves the original indexing, ensuring
       alignment with the input dataset.
 
     """
-    try:
-        with open(jsonpath, 'r') as jsonfile:
-            weights = json.load(jsonfile)
-    except Exception as e:
-        print(f'An exception type {type(e).__name__} has ocurred, please check the json file {jsonpath}')
-        exit(1)
-
-    try:
-        required = {"theta_0","theta_1","theta_2","theta_3","means","stds"}
-        for house, data in weights.items():
-            if not required.issubset(data):
-                print(f"Missing fields in JSON for {house}")
-                exit(1)
-        df_weights = pd.DataFrame.from_dict(weights, orient='index')
-        if df_weights[['theta_0','theta_1','theta_2','theta_3']].isna().any().any():
-            print("Invalid numeric values in theta fields")
-            exit(1)
-        if df_weights.empty:
-            print("JSON contains no houses")
-            exit(1)
-        means = df_weights.iloc[0]['means']
-        stds = df_weights.iloc[0]['stds']
-
-    except Exception as e:
-        print(f'An exception type {type(e).__name__} has ocurred, the data in {jsonpath} could not generate a DataFrame')
-        exit(1)
+    features, houses, theta, scaler = weight_arrays(read_weights(jsonpath) if weights is None else weights)
 
     try:
         original_index = df_predict.index.copy()
-        features = [config.feature_1, config.feature_2, config.feature_3]
         df_predict = df_predict[features]
         df_predict = df_predict.apply(pd.to_numeric, errors="coerce")
-        df_clean = df_predict.dropna().copy()
-        if df_clean.empty:
+        values = df_predict.to_numpy(dtype=np.float64)
+        complete = ~np.isnan(values).any(axis=1)
+        if not complete.any() and not allow_empty:
             print("No numeric values in data")
             exit(1)
-        if df_clean[f'{features[0]}'].empty or df_clean[f'{features[1]}'].empty or df_clean[f'{features[2]}'].empty:
-            print("Empty column")
-            exit(1)
-        if any(not isinstance(x, (int, float)) for x in means):
-            print(f"Invalid value for mean: {means}")
-            exit(1)
-        if any(not isinstance(x, (int, float)) or x <= 0 for x in stds):
-            print(f"Invalid value for std: {stds}")
-            exit(1)
-        if len(means) != 3 or len(stds) != 3:
-            print("Means/stds must contain 3 elements")
-            exit(1)
-        df_clean[f'{features[0]}_standarized'] = standarize(df_clean[features[0]], means[0], stds[0])
-        df_clean[f'{features[1]}_standarized'] = standarize(df_clean[features[1]], means[1], stds[1])
-        df_clean[f'{features[2]}_standarized'] = standarize(df_clean[features[2]], means[2], stds[2])
+        x = design_matrix(scaler.transform(values[complete]))
     except Exception as e:
         print(f'An exception type {type(e).__name__} has ocurred standarizing DataFrame')
         exit(1)            
 
-    np.seterr(over='raise')
-    for house in df_weights.index:
-        try:
-            df_clean[f'z_{house}'] = (
-                df_weights.loc[house]['theta_0']
-                + df_weights.loc[house]['theta_1'] * df_clean[f'{features[0]}_standarized']
-                + df_weights.loc[house]['theta_2'] * df_clean[f'{features[1]}_standarized']
-                + df_weights.loc[house]['theta_3'] * df_clean[f'{features[2]}_standarized']
-            )
-            df_clean[f'p_{house}'] = np.where(
-                df_clean[f'z_{house}'] >= 0,
-                1 / (1 + np.exp(- df_clean[f'z_{house}'])),
-                np.exp(df_clean[f'z_{house}']) / ( 1 + np.exp(df_clean[f'z_{house}']))
-                )
-        except FloatingPointError:
-            print("Overflow computing exp(z). Values too large. Check your weights or inputs.")
-            exit(1)
-        except Exception as e:
-            print(f'An exception type {type(e).__name__} has ocurred')
-            exit(1)
-    p_cols = [f'p_{house}' for house in df_weights.index]
     try:
-        df_clean[config.target_label] = df_clean[p_cols].idxmax(axis=1).str.replace('p_', '')
-    except Exception as e:
-        print(f'An exception type {type(e).__name__} has ocurred, check target_label')
+        with np.errstate(over='raise'):
+            p = sigmoid(x @ theta)
+    except FloatingPointError:
+        print("Overflow computing exp(z). Values too large. Check your weights or inputs.")
         exit(1)
-    if df_clean[p_cols].isna().any().any() or np.isinf(df_clean[p_cols]).any().any():
+    if not np.isfinite(p).all():
         print("Invalid probability values, check your weights or inputs.")
         exit(1)
-    df_final = pd.DataFrame(index=original_index)
-    df_final[config.target_label] = None
-    df_final.loc[df_clean.index, config.target_label] = df_clean[config.target_label]
-    return df_final
+    predictions = np.full(len(original_index), None, dtype=object)
+    predictions[complete] = houses[p.argmax(axis=1)]
+    return pd.DataFrame({config.target_label: predictions}, index=original_index, dtype=object)
+
+
+# Rows every worker of parallel_predictions reads at a time by default
+SHARD_CHUNKSIZE = 100000
+
+
+def stream_predictions(file_path, jsonpath, output, chunksize, weights=None):
+    """
+    Predicts the houses of a CSV file read `chunksize` rows at a time and
+    appends them to `output` chunk by chunk, so memory stays bounded by the
+    chunk size whatever the size of the file. The output is the one of
+    `Predict` on the whole file: same rows, order and index.
+
+    Parameters:
+        file_path (str): CSV file to classify.
+        jsonpath (str): Path to the weights JSON file.
+        output (str): CSV file the predictions are written to.
+        chunksize (int): Rows read at a time.
+        weights (tuple | None): The result of `read_weights(jsonpath)`,
+            when it is already loaded.
+
+    Returns:
+        int: Number of rows read.
+    """
+    if chunksize <= 0:
+        print("chunksize must be a positive number")
+        exit(1)
+    weights = read_weights(jsonpath) if weights is None else weights
+    rows, predicted = predict_range(file_path, jsonpath, output, chunksize, weights)
+    if predicted == 0:
+        print("No numeric values in data")
+        exit(1)
+    return rows
 
 
+def predict_range(file_path, jsonpath, output, chunksize, weights, start=0, stop=None, header=True):
+    """
+    Predicts the rows of the byte range [start, stop) of a CSV file (the
+    whole file by default) chunk by chunk and writes them to `output`, with
+    the CSV header or not.
+
+    Returns:
+        tuple: (rows read, rows predicted)
+    """
+    rows, predicted = 0, 0
+    try:
+        with open(output, 'w', newline='') as csvfile:
+            for chunk in read_chunks(file_path, chunksize, start, weights[1], stop):
+                prediction = Predict(chunk, jsonpath, weights, allow_empty=True)
+                prediction.to_csv(csvfile, header=header and rows == 0, index=True)
+                rows += len(prediction)
+                predicted += int(prediction[config.target_label].notna().sum())
+    except OSError as e:
+        print(f'An exception type {type(e).__name__} has ocurred writing {output}')
+        exit(1)
+    return rows, predicted
+
+
+def parallel_predictions(file_path, jsonpath, output, jobs=0, chunksize=None, weights=None):
+    """
+    Predicts the houses of a CSV file with several worker processes.
+
+    The rows of the file are split into one byte range per worker, aligned
+    to line boundaries (see utils.utils.line_shards). Every worker reads its
+    range in chunks of `chunksize` rows, scores them with the weights loaded
+    once by the parent and writes its predictions to a part file. The parts
+    are then concatenated, in file order, after the header: `output` is the
+    one of `Predict` on the whole file.
+
+    Parameters:
+        file_path (str): CSV file to classify.
+        jsonpath (str): Path to the weights JSON file.
+        output (str): CSV file the predictions are written to.
+        jobs (int): Worker processes, 0 for one per available core.
+        chunksize (int | None): Rows each worker reads at a time,
+            SHARD_CHUNKSIZE by default.
+        weights (tuple | None): The result of `read_weights(jsonpath)`,
+            when it is already loaded.
+
+    Returns:
+        int: Number of rows read.
+    """
+    chunksize = SHARD_CHUNKSIZE if chunksize is None else chunksize
+    if chunksize <= 0 or jobs < 0:
+        print("chunksize must be a positive number and jobs can not be negative")
+        exit(1)
+    weights = read_weights(jsonpath) if weights is None else weights
+    shards = line_shards(file_path, worker_count(jobs, available_cpus()))
+    if len(shards) <= 1:
+        return stream_predictions(file_path, jsonpath, output, chunksize, weights)
+
+    directory = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(output)), prefix='.tmp_shards_')
+    try:
+        parts = [os.path.join(directory, f'{k}.csv') for k in range(len(shards))]
+        with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+            futures = [pool.submit(predict_range, file_path, jsonpath, part, chunksize, weights, start, stop, False)
+                       for part, (start, stop) in zip(parts, shards)]
+            counts = [future.result() for future in futures]
+        if sum(predicted for _, predicted in counts) == 0:
+            print("No numeric values in data")
+            exit(1)
+        index_name = pd.read_csv(file_path, nrows=0).columns[0]
+        with open(output, 'w', newline='') as csvfile:
+            pd.DataFrame(columns=[config.target_label], index=pd.Index([], name=index_name)).to_csv(csvfile)
+            for part in parts:
+                with open(part, 'r', newline='') as partfile:
+                    shutil.copyfileobj(partfile, csvfile)
+    except OSError as e:
+        print(f'An exception type {type(e).__name__} has ocurred writing {output}')
+        exit(1)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return sum(rows for rows, _ in counts)
@@ -0,0 +1,135 @@
+import sys
+import numpy as np
+import pandas as pd
+from logistic_regression.descent import design_matrix
+
+
+def complete_rows(chunk:pd.DataFrame, features:list, classifier:str):
+    """
+    Labels and float feature matrix of the rows of a chunk whose house and
+    features are all present and numeric (non-numeric values are coerced to
+    NaN and dropped). The chunk itself is not modified.
+    """
+    try:
+        frame = chunk[[classifier] + features]
+        frame = frame.assign(**{feature: pd.to_numeric(frame[feature], errors="coerce") for feature in features})
+        frame = frame.dropna()
+        return frame[classifier].to_numpy(), frame[features].to_numpy(dtype=np.float64)
+    except Exception as e:
+        print(f"An exception type {type(e).__name__} has ocurred, please check the input file and the features")
+        sys.exit(1)
+
+
+class Scaler():
+    """
+    Standardization of the features: (values - means) / stds, one mean and
+    (population) standard deviation per column.
+
+    Attributes:
+        means, stds (np.ndarray): One value per feature.
+
+    Methods:
+        fit(values):
+            Scaler of the columns of a float matrix.
+
+        from_moments(moments):
+            Scaler of the columns accumulated in a describe Moments.
+
+        transform(values):
+            Standardized copy of a float matrix of shape (rows, features).
+    """
+    def __init__(self, means, stds):
+        self.means = np.asarray(means, dtype=np.float64)
+        self.stds = np.asarray(stds, dtype=np.float64)
+
+    @classmethod
+    def fit(cls, values: np.ndarray):
+        # Column-major, so that every column is summed pairwise over
+        # contiguous memory, as utils.utils.get_mean and get_std do
+        values = np.asfortranarray(values)
+        means = values.sum(axis=0) / len(values)
+        stds = (((values - means) ** 2).sum(axis=0) / len(values)) ** 0.5
+        return cls(means, stds)
+
+    @classmethod
+    def from_moments(cls, moments):
+        return cls(moments.mean, np.sqrt(moments.m2 / moments.count))
+
+    def transform(self, values: np.ndarray):
+        return (values - self.means) / self.stds
+
+
+class Preprocessing():
+    """
+    The cleaning and standardization of a training dataset, done once and
+    shared by the models of every house.
+
+    The house and feature columns are read from the DataFrame without
+    modifying it: non-numeric values are coerced to NaN and the rows with a
+    missing value are dropped (see `complete_rows`). The features of the
+    remaining rows are kept as a float matrix, their houses as integer
+    codes, and a `Scaler` is fitted on them. The design matrix is built the
+    first time a model asks for it and then reused by all of them.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Input dataset containing the classifier column and the selected features.
+    features : list[str]
+        Names of the features to be used as predictors (theta_1, theta_2...
+        in this order).
+    classifier : str
+        Column name representing the categorical target (houses).
+
+    Attributes
+    ----------
+    values : np.ndarray
+        Features of the complete rows, shape (n, features).
+    codes : np.ndarray
+        House of every row, as its position in `houses`.
+    houses : list[str]
+        The houses of the complete rows, in order of appearance.
+    scaler : Scaler
+        Standardization of the features, fitted on `values`.
+    """
+    def __init__(self, df:pd.DataFrame, features:list, classifier:str):
+        self.features = list(features)
+        self.classifier = classifier
+        if not self.features or len(set(self.features)) != len(self.features):
+            print("At least one feature is needed, without repetitions")
+            sys.exit(1)
+        labels, self.values = complete_rows(df, self.features, classifier)
+        if len(self.values) == 0:
+            print("No numeric values in data")
+            sys.exit(1)
+        codes, houses = pd.factorize(labels)
+        self.codes = codes
+        self.houses = list(houses)
+        self.standardize_with(Scaler.fit(self.values))
+        if np.isnan(self.scaler.means).any() or np.isnan(self.scaler.stds).any():
+            print("Error: mean or std could not be computed. Column may contain non-numeric values.")
+            sys.exit(1)
+
+    def standardize_with(self, scaler:Scaler):
+        """Uses `scaler` (e.g. with the statistics of more rows) instead of the fitted one."""
+        self.scaler = scaler
+        self.x = None
+
+    def outcomes(self, houses:list):
+        """One-vs-all outcomes of the rows, shape (n, len(houses))."""
+        return (self.codes[:, None] == np.array([self.code(house) for house in houses])[None, :]).astype(np.float64)
+
+    def code(self, house):
+        return self.houses.index(house) if house in self.houses else -1
+
+    def matrix(self):
+        """
+        Design matrix of the standardized features (see `design_matrix`),
+        built once. Exits if a feature has `std = 0`.
+        """
+        if self.x is None:
+            if (self.scaler.stds == 0).any():
+                print("Invalid data, standard desviation in a column is zero, cannot standardize")
+                sys.exit(1)
+            self.x = design_matrix(self.scaler.transform(self.values))
+        return self.x
@@ -0,0 +1,243 @@
+import itertools
+import math
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from logistic_regression.descent import design_matrix, gradient_descent, log_loss, sigmoid
+from logistic_regression.preprocessing import Preprocessing, complete_rows
+from utils.shared import SharedArray, worker_count
+
+
+def grid_configs(lrs, max_steps, min_step_sizes):
+    """Every combination of the given values."""
+    return [{"lr": lr, "max_steps": steps, "min_step_size": size}
+            for lr, steps, size in itertools.product(lrs, max_steps, min_step_sizes)]
+
+
+def random_configs(lrs, max_steps, min_step_sizes, count, seed=0):
+    """
+    `count` configurations drawn between the smallest and the largest of the
+    given values: log-uniform for lr and min_step_size, uniform for
+    max_steps.
+    """
+    rng = np.random.default_rng(seed)
+
+    def log_uniform(values):
+        low, high = np.log(min(values)), np.log(max(values))
+        return float(np.exp(rng.uniform(low, high)))
+
+    return [{"lr": log_uniform(lrs),
+             "max_steps": int(rng.integers(min(max_steps), max(max_steps), endpoint=True)),
+             "min_step_size": log_uniform(min_step_sizes)}
+            for _ in range(count)]
+
+
+class SearchData():
+    """
+    The matrices shared by every configuration of a search, prepared once.
+
+    The rows are split at random into a training part and a held-out
+    validation part. The features are cleaned and standardized with the
+    means and standard deviations of the training rows only (see
+    `Preprocessing`) and the validation rows with the same scaler.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataset with the classifier column and the features.
+    features : list[str]
+        Names of the features.
+    classifier : str
+        Column name of the houses.
+    validation : float
+        Fraction of the rows held out, between 0 and 1.
+    seed : int
+        Seed of the split.
+
+    Attributes
+    ----------
+    x, y : np.ndarray
+        Training design matrix (n, features + 1) and one-vs-all outcomes (n, K).
+    x_val, y_val : np.ndarray
+        The same for the validation rows.
+    houses : list[str]
+        One column of the outcomes each.
+    features : list[str]
+        The features, in the order of the rows of theta after the intercept.
+    means, stds : list[float]
+        Standardization of the features.
+    """
+    def __init__(self, df:pd.DataFrame, features:list, classifier:str, validation=0.2, seed=0):
+        if not 0 < validation < 1:
+            print("validation must be between 0 and 1")
+            exit(1)
+        order = np.random.default_rng(seed).permutation(len(df))
+        held_out = int(round(len(df) * validation))
+        if held_out == 0 or held_out == len(df):
+            print("Not enough rows to hold out a validation split")
+            exit(1)
+        train_df, validation_df = df.iloc[order[held_out:]], df.iloc[order[:held_out]]
+        self.houses = [house for house in df[classifier].dropna().unique().tolist()]
+        data = Preprocessing(train_df, features, classifier)
+        self.features = data.features
+        self.means = data.scaler.means.tolist()
+        self.stds = data.scaler.stds.tolist()
+        self.x = data.matrix()
+        self.y = data.outcomes(self.houses)
+        labels, values = complete_rows(validation_df, features, classifier)
+        self.x_val = design_matrix(data.scaler.transform(values))
+        self.y_val = (labels[:, None] == np.array(self.houses, dtype=object)[None, :]).astype(np.float64)
+        if len(self.x_val) == 0:
+            print("No complete rows in the validation split")
+            exit(1)
+
+
+def validation_scores(theta, x_val, y_val):
+    """Mean log-loss of the one-vs-all models and accuracy of the argmax prediction."""
+    p = sigmoid(x_val @ theta)
+    accuracy = np.mean(p.argmax(axis=1) == y_val.argmax(axis=1))
+    return float(log_loss(y_val, p).mean()), float(accuracy)
+
+
+def run_trial(x, y, x_val, y_val, lr, min_step_size, steps, theta):
+    """
+    Continues the gradient descent of a configuration for at most `steps`
+    steps from `theta` and scores it on the validation rows.
+
+    Returns:
+        tuple: (theta, steps run by each house, log-loss, accuracy, seconds)
+    """
+    start = time.perf_counter()
+    theta, _, run = gradient_descent(x, y, lr, steps, min_step_size, theta)
+    loss, accuracy = validation_scores(theta, x_val, y_val)
+    return theta, run, loss, accuracy, time.perf_counter() - start
+
+
+def trial_task(specs, lr, min_step_size, steps, theta):
+    """Worker task: maps the shared matrices of the search and runs a trial."""
+    shms, arrays = zip(*[SharedArray.attach(spec) for spec in specs])
+    try:
+        return run_trial(*arrays, lr, min_step_size, steps, theta)
+    finally:
+        del arrays
+        for shm in shms:
+            shm.close()
+
+
+class Trial():
+    """
+    A configuration being evaluated: its theta matrix and the steps run and
+    convergence of each house so far, and its latest validation scores.
+    """
+    def __init__(self, config:dict, parameters:int, houses:int):
+        self.config = config
+        self.theta = np.zeros((parameters, houses))
+        self.steps = np.zeros(houses, dtype=int)
+        self.converged = np.zeros(houses, dtype=bool)
+        self.rung = 0
+        self.log_loss = math.inf
+        self.accuracy = 0.0
+        self.seconds = 0.0
+
+    @property
+    def complete(self):
+        return bool(np.all(self.converged | (self.steps >= self.config["max_steps"])))
+
+    def budget(self, target):
+        """Steps to run to reach `target` steps (or max_steps) in total."""
+        return min(target, self.config["max_steps"]) - int(self.steps[~self.converged].max())
+
+    def update(self, theta, run, budget, loss, accuracy, seconds):
+        active = ~self.converged
+        # A house that stopped before the budget converged; converged houses
+        # only take one more step, that does not move them
+        self.converged |= active & (run < budget)
+        self.steps[active] += run[active]
+        self.theta = theta
+        self.log_loss, self.accuracy = loss, accuracy
+        self.seconds += seconds
+
+    def row(self):
+        return {**self.config, "rung": self.rung, "steps": int(self.steps.max()),
+                "log_loss": self.log_loss, "accuracy": self.accuracy, "seconds": self.seconds}
+
+
+def successive_halving(data:SearchData, configs:list, min_budget=500, eta=3, jobs=0):
+    """
+    Evaluates the configurations with successive halving.
+
+    Every rung trains the surviving configurations up to `min_budget` *
+    `eta` ** rung gradient descent steps (or their max_steps), continuing
+    from the theta of the previous rung, and scores them with the log-loss
+    on the validation rows. Only the best 1 / `eta` of them go on to the
+    next rung, until the survivors have converged or reached their
+    max_steps. The trials of a rung run in parallel worker processes, which
+    map the matrices of `data` from shared memory.
+
+    Parameters
+    ----------
+    data : SearchData
+        Training and validation matrices.
+    configs : list[dict]
+        lr, max_steps and min_step_size of every configuration.
+    min_budget : int
+        Steps of the first rung.
+    eta : int
+        Reduction factor of every rung, at least 2.
+    jobs : int
+        Worker processes, 0 for one per available core.
+
+    Returns
+    -------
+    tuple[Trial, list[Trial]]
+        The best trial and every trial, with the rung it reached.
+    """
+    if min_budget <= 0 or eta < 2 or not configs:
+        print("min_budget must be positive, eta at least 2 and at least one configuration is needed")
+        exit(1)
+    for config in configs:
+        if config["lr"] <= 0 or config["max_steps"] <= 0 or config["min_step_size"] <= 0:
+            print("Learning rate, max_steps and min_step_size must be positive numbers")
+            exit(1)
+    trials = [Trial(config, data.x.shape[1], data.y.shape[1]) for config in configs]
+    workers = worker_count(jobs, len(trials))
+    matrices = [data.x, data.y, data.x_val, data.y_val]
+    shared = [SharedArray(matrix) for matrix in matrices] if workers > 1 else []
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        survivors, rung = trials, 0
+        while True:
+            target = min_budget * eta ** rung
+            pending = [(trial, trial.budget(target)) for trial in survivors if not trial.complete]
+            pending = [(trial, budget) for trial, budget in pending if budget > 0]
+            if pool is None:
+                results = [run_trial(*matrices, trial.config["lr"], trial.config["min_step_size"], budget, trial.theta)
+                           for trial, budget in pending]
+            else:
+                specs = [array.spec for array in shared]
+                futures = [pool.submit(trial_task, specs, trial.config["lr"], trial.config["min_step_size"], budget, trial.theta)
+                           for trial, budget in pending]
+                results = [future.result() for future in futures]
+            for (trial, budget), result in zip(pending, results):
+                trial.update(*result[:2], budget, *result[2:])
+            for trial in survivors:
+                trial.rung = rung
+            if all(trial.complete for trial in survivors):
+                break
+            if len(survivors) > 1:
+                survivors = sorted(survivors, key=lambda trial: trial.log_loss)[:max(1, len(survivors) // eta)]
+            rung += 1
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        for array in shared:
+            array.close()
+    best = min(survivors, key=lambda trial: trial.log_loss)
+    return best, trials
+
+
+def results_table(trials:list):
+    """One row per trial, the furthest rungs and lowest log-losses first."""
+    table = pd.DataFrame([trial.row() for trial in trials])
+    return table.sort_values(["rung", "log_loss"], ascending=[False, True], ignore_index=True)
@@ -0,0 +1,395 @@
+import asyncio
+import json
+import math
+import os
+import signal
+import numpy as np
+from logistic_regression.descent import design_matrix, sigmoid
+from logistic_regression.predict import read_weights, weight_arrays
+
+# Largest request body accepted, in bytes
+MAX_BODY = 64 * 1024 * 1024
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error"}
+
+
+class RequestError(Exception):
+    """Invalid request, answered with `status` and the message."""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ServedModel():
+    """
+    The weights of a weights.json file, loaded once and kept as the arrays
+    `Predict` scores with, and reloaded when the file changes.
+
+    Parameters
+    ----------
+    jsonpath : str
+        Path to the weights JSON file generated during training.
+
+    Attributes
+    ----------
+    features : list[str]
+        Features of the model, in the order of its thetas.
+    houses : np.ndarray
+        Object array of the house names.
+    theta : np.ndarray
+        Weights of the houses, shape (features + 1, houses).
+    scaler : Scaler
+        Standardization stored with the weights.
+    version : tuple
+        (mtime in nanoseconds, size) of the file the weights were read from.
+
+    Methods
+    -------
+    refresh():
+        Reloads the weights if the file changed since they were read.
+
+    score(values):
+        Probabilities of every house for a float matrix of feature values.
+    """
+    def __init__(self, jsonpath:str):
+        self.jsonpath = jsonpath
+        self.version = None
+        self.failed = None
+        if not self.refresh():
+            if self.failed is None:
+                print(f"The weights could not be loaded from {self.jsonpath}")
+            exit(1)
+
+    def stat(self):
+        try:
+            info = os.stat(self.jsonpath)
+            return info.st_mtime_ns, info.st_size
+        except OSError:
+            return None
+
+    def refresh(self):
+        """
+        Reloads the weights when the modification time or the size of the
+        file changed. A file that can not be read or fails the validation of
+        `read_weights` is reported once and the previous weights are kept.
+
+        Returns:
+            bool: whether weights are loaded.
+        """
+        version = self.stat()
+        if version is None or version == self.version or version == self.failed:
+            return self.version is not None
+        try:
+            self.features, self.houses, self.theta, self.scaler = weight_arrays(read_weights(self.jsonpath))
+        except SystemExit:
+            if self.version is not None:
+                print(f"Keeping the previous weights, {self.jsonpath} could not be loaded")
+            self.failed = version
+            return self.version is not None
+        self.version = version
+        self.failed = None
+        print(f"Loaded {self.jsonpath}: {len(self.houses)} houses, features {self.features}")
+        return True
+
+    def score(self, values: np.ndarray):
+        """
+        Probabilities of every house for the complete rows of `values`, of
+        shape (rows, features), as in `Predict`.
+
+        Returns:
+            tuple: (complete, p). `complete` flags the rows without NaN and
+                `p` has one row per complete row and one column per house.
+        """
+        complete = ~np.isnan(values).any(axis=1)
+        x = design_matrix(self.scaler.transform(values[complete]))
+        with np.errstate(over='raise'):
+            p = sigmoid(x @ self.theta)
+        return complete, p
+
+    def describe(self):
+        return {"jsonpath": self.jsonpath, "features": list(self.features),
+                "houses": self.houses.tolist(), "means": self.scaler.means.tolist(),
+                "stds": self.scaler.stds.tolist()}
+
+
+def to_float(value):
+    """Value of a feature as a float, NaN when it is missing or not numeric (as pd.to_numeric with errors='coerce')."""
+    if isinstance(value, bool) or value is None:
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return math.nan
+    return math.nan
+
+
+def row_values(rows:list, features:list):
+    """
+    Float matrix of shape (rows, features) of the rows of a request: objects
+    mapping the feature names to their values, or lists of the values in
+    the order of the features.
+    """
+    values = np.empty((len(rows), len(features)), dtype=np.float64)
+    for i, row in enumerate(rows):
+        if isinstance(row, dict):
+            values[i] = [to_float(row.get(feature)) for feature in features]
+        elif isinstance(row, list) and len(row) == len(features):
+            values[i] = [to_float(value) for value in row]
+        else:
+            raise RequestError(400, f"Every row must be an object or a list of {len(features)} values ({', '.join(features)})")
+    return values
+
+
+class MicroBatcher():
+    """
+    Groups the rows of the requests received at about the same time into a
+    single matrix, scored with one matrix product.
+
+    The requests wait in a queue. A single task takes the first waiting
+    request, then every request already queued (and, with `max_wait`, the
+    ones arriving during that many seconds) up to `max_rows` rows, checks
+    that the weights file has not changed, scores the batch and answers
+    every request with its slice of the predictions.
+
+    Parameters
+    ----------
+    model : ServedModel
+        Weights the requests are scored with.
+    max_rows : int
+        Rows after which no more requests are added to a batch (a larger
+        request still forms a batch of its own).
+    max_wait : float
+        Seconds a batch waits for more requests, 0 to take only the queued ones.
+
+    Methods
+    -------
+    predict(rows):
+        Coroutine: the predicted house of every row (None for incomplete rows).
+
+    run():
+        Coroutine: scores the queued requests, forever.
+    """
+    def __init__(self, model:ServedModel, max_rows=4096, max_wait=0.0):
+        self.model = model
+        self.max_rows = max_rows
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.requests = 0
+
+    async def predict(self, rows:list):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((rows, future))
+        return await future
+
+    async def collect(self):
+        batch = [await self.queue.get()]
+        size = len(batch[0][0])
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while size < self.max_rows:
+            if self.queue.empty():
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    # Lets the connections that already have a request ready queue it
+                    await asyncio.sleep(0)
+                    if self.queue.empty():
+                        break
+                    continue
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = self.queue.get_nowait()
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    async def run(self):
+        while True:
+            batch = await self.collect()
+            self.model.refresh()
+            self.batches += 1
+            self.requests += len(batch)
+            try:
+                results = self.score(batch)
+            except Exception as e:
+                results = [RequestError(500, f"An exception type {type(e).__name__} has ocurred scoring the batch")] * len(batch)
+            for (rows, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def score(self, batch:list):
+        """Predictions (or a RequestError) of every request of a batch."""
+        model = self.model
+        results, matrices = [], []
+        for rows, _ in batch:
+            try:
+                matrices.append(row_values(rows, model.features))
+                results.append(None)
+            except RequestError as e:
+                matrices.append(None)
+                results.append(e)
+        valid = [k for k, values in enumerate(matrices) if values is not None]
+        if not valid:
+            return results
+        try:
+            complete, p = model.score(np.concatenate([matrices[k] for k in valid]))
+            bounds = np.cumsum([0] + [len(matrices[k]) for k in valid])
+            # Rows of p of the complete rows before every row of the batch
+            offsets = np.concatenate([[0], np.cumsum(complete)])
+            for k, start, stop in zip(valid, bounds[:-1], bounds[1:]):
+                results[k] = self.answer(complete[start:stop], p[offsets[start]:offsets[stop]])
+        except FloatingPointError:
+            # Scores the requests one by one, so that only the ones with the
+            # values too large fail
+            for k in valid:
+                try:
+                    results[k] = self.answer(*model.score(matrices[k]))
+                except FloatingPointError:
+                    results[k] = RequestError(422, "Overflow computing exp(z). Values too large. Check your weights or inputs.")
+        return results
+
+    def answer(self, complete: np.ndarray, p: np.ndarray):
+        if not np.isfinite(p).all():
+            return RequestError(422, "Invalid probability values, check your weights or inputs.")
+        predictions = np.full(len(complete), None, dtype=object)
+        predictions[complete] = self.model.houses[p.argmax(axis=1)]
+        return predictions.tolist()
+
+
+def parse_body(body:bytes):
+    """Rows of a /predict request, and whether it is a single row."""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise RequestError(400, "The body must be JSON")
+    if isinstance(data, dict) and "rows" in data:
+        data = data["rows"]
+    elif isinstance(data, dict):
+        return [data], True
+    if not isinstance(data, list):
+        raise RequestError(400, "The body must be a row (object) or a list of rows")
+    return data, False
+
+
+async def handle(batcher:MicroBatcher, method:str, path:str, body:bytes):
+    """Status and JSON answer of a request."""
+    if path == "/predict":
+        if method != "POST":
+            raise RequestError(405, "Use POST /predict")
+        rows, single = parse_body(body)
+        houses = await batcher.predict(rows) if rows else []
+        return 200, {"house": houses[0]} if single else {"houses": houses}
+    if path == "/model":
+        if method != "GET":
+            raise RequestError(405, "Use GET /model")
+        return 200, {**batcher.model.describe(), "batches": batcher.batches, "requests": batcher.requests}
+    raise RequestError(404, "Unknown path, use POST /predict or GET /model")
+
+
+async def read_request(reader:asyncio.StreamReader):
+    """
+    Method, path, body and keep-alive of the next HTTP/1.1 request of a
+    connection, or None when the client closed it.
+    """
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise RequestError(413, "Headers too large")
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, path, version = lines[0].split(" ")
+    except ValueError:
+        raise RequestError(400, "Malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise RequestError(400, "Invalid Content-Length")
+    if length < 0 or length > MAX_BODY:
+        raise RequestError(413, f"The body can not be larger than {MAX_BODY} bytes")
+    body = await reader.readexactly(length) if length else b""
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+    return method, path.split("?", 1)[0], body, keep_alive
+
+
+def response(status:int, data, keep_alive:bool):
+    body = json.dumps(data).encode()
+    head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode() + body
+
+
+async def connection(batcher:MicroBatcher, reader:asyncio.StreamReader, writer:asyncio.StreamWriter):
+    """Answers the requests of a connection, in order, until it is closed."""
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+                status, data = await handle(batcher, method, path, body)
+            except RequestError as e:
+                keep_alive = e.status not in (400, 413)
+                status, data = e.status, {"error": str(e)}
+            writer.write(response(status, data, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(model:ServedModel, host="127.0.0.1", port=8000, socket_path=None, max_rows=4096, max_wait=0.0):
+    """
+    Serves the predictions of `model` over HTTP, on a TCP port or on a Unix
+    socket, until the task is cancelled (or SIGINT / SIGTERM is received).
+
+    Parameters:
+        model (ServedModel): Weights the requests are scored with.
+        host (str), port (int): Address to listen on, without `socket_path`.
+        socket_path (str | None): Unix socket to listen on instead.
+        max_rows (int), max_wait (float): Micro-batches, see `MicroBatcher`.
+    """
+    batcher = MicroBatcher(model, max_rows, max_wait)
+    scorer = asyncio.create_task(batcher.run())
+    handler = lambda reader, writer: connection(batcher, reader, writer)
+    if socket_path is not None:
+        server = await asyncio.start_unix_server(handler, socket_path)
+        address = socket_path
+    else:
+        server = await asyncio.start_server(handler, host, port)
+        address = "http://%s:%d" % server.sockets[0].getsockname()[:2]
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    print(f"Serving predictions on {address} (POST /predict, GET /model)", flush=True)
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        print("Termination requested...")
+        scorer.cancel()
+        if socket_path is not None and os.path.exists(socket_path):
+            os.remove(socket_path)
@@ -0,0 +1,181 @@
+import sys
+import numpy as np
+import pandas as pd
+from describe.accumulator import Moments
+from logistic_regression.descent import design_matrix, sigmoid, log_loss
+from logistic_regression.preprocessing import complete_rows, Scaler
+from utils.utils import read_chunks
+
+# Learning rate of each epoch (counted from 0) for a base rate and a decay
+LR_SCHEDULES = {
+    'constant': lambda lr, epoch, decay: lr,
+    'inverse': lambda lr, epoch, decay: lr / (1 + decay * epoch),
+    'exponential': lambda lr, epoch, decay: lr * decay ** epoch,
+}
+
+
+class StreamingModel():
+    """
+    One-vs-all logistic regression trained with mini-batch stochastic
+    gradient descent on a CSV file read in chunks.
+
+    Memory is bounded by the chunk size, whatever the size of the file: the
+    file is never loaded whole. A first pass over the chunks collects the
+    houses and the means and standard deviations of the features (mergeable
+    moments, see describe.accumulator.Moments). Every training epoch then
+    reads the file again, standardizes each chunk and updates all the houses
+    at once, one mini-batch at a time.
+
+    Rows with a missing or non-numeric value in a feature or in the house
+    column are skipped, as `Model` drops them. The attributes mirror the ones
+    of `Model` (`features`, `means`, `stds`), so the weights are saved in the
+    same weights.json format.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the training CSV file.
+    features : list[str]
+        Names of the features to be used as predictors.
+    classifier : str
+        Column name representing the categorical target (houses).
+    chunksize : int
+        Number of rows read at a time.
+    """
+    def __init__(self, file_path:str, features:list, classifier:str, chunksize:int):
+        self.file_path = file_path
+        self.features = list(features)
+        self.classifier = classifier
+        self.chunksize = chunksize
+        if chunksize <= 0:
+            print("chunksize must be a positive number")
+            sys.exit(1)
+        moments = Moments(self.features)
+        houses = {}
+        for chunk in self.read():
+            for house in chunk[classifier].dropna().unique():
+                houses.setdefault(house)
+            labels, features = self.clean(chunk)
+            moments.update(features)
+        self.houses = list(houses)
+        self.moments = moments
+        self.rows = int(moments.count[0])
+        if self.rows == 0 or not self.houses:
+            print("No numeric values in data")
+            sys.exit(1)
+        # Population standard deviations, as Scaler.fit
+        self.scaler = Scaler.from_moments(moments)
+        self.means = self.scaler.means.tolist()
+        self.stds = self.scaler.stds.tolist()
+
+    def read(self):
+        return read_chunks(self.file_path, self.chunksize, columns=[self.classifier] + self.features)
+
+    def clean(self, chunk:pd.DataFrame):
+        """Labels and float feature matrix of the complete rows of a chunk."""
+        return complete_rows(chunk, self.features, self.classifier)
+
+    def train(self, args, seed=0, theta=None, checkpoint=None):
+        """
+        Trains the one-vs-all models of all the houses with mini-batch SGD.
+
+        Each chunk is standardized with the moments of the first pass and its
+        rows are shuffled; every mini-batch of `batch_size` rows then moves
+        the (features + 1) x K theta matrix by `lr` times the gradient of the
+        batch log-loss. The learning rate of every epoch follows the schedule.
+        Training stops after `epochs` epochs, or earlier when no parameter
+        moved more than `min_step_size` during a whole epoch.
+
+        Parameters
+        ----------
+        args : Namespace
+            Arguments namespace containing lr, min_step_size, epochs,
+            batch_size, lr_schedule (a key of LR_SCHEDULES), lr_decay and
+            cost_every.
+        seed : int
+            Seed of the shuffling of the rows.
+        theta : np.ndarray, optional
+            Starting theta matrix (warm start), zeros by default.
+        checkpoint : logistic_regression.checkpoint.Checkpoint, optional
+            Saved at the end of every epoch (theta, the cost of every epoch,
+            the epoch and the state of the random generator: a write costs
+            the same whatever the rows of the file), and resumed from the
+            epoch it reached. On SIGINT /
+            SIGTERM, the current epoch is abandoned: training returns the
+            state saved at the end of the previous one.
+
+        Returns
+        -------
+        np.ndarray
+            Theta matrix of shape (features + 1, K), one column per house.
+
+        Notes
+        -----
+        - Stores in `costs` a list of (house, DataFrame with step and cost),
+        one step per epoch, the cost being the mean log-loss of its
+        mini-batches before their updates, only evaluated every `cost_every`
+        mini-batches of the epoch, from the first one (NaN if cost_every is 0).
+        The mini-batches that are not evaluated are not recorded. The history is
+        a preallocated (epochs, K) array, so its memory does not grow with
+        the rows of the file.
+        """
+        if args.lr <= 0 or args.epochs <= 0 or args.batch_size <= 0 or args.min_step_size <= 0:
+            print("Learning rate, epochs, batch_size and min_step_size must be positive numbers")
+            sys.exit(1)
+        if 0 in self.stds:
+            print("Invalid data, standard desviation in a column is zero, cannot standardize")
+            sys.exit(1)
+        schedule = LR_SCHEDULES[args.lr_schedule]
+        houses = np.array(self.houses, dtype=object)
+        rng = np.random.default_rng(seed)
+        theta = np.zeros((len(self.features) + 1, len(houses))) if theta is None else np.array(theta, dtype=np.float64)
+        tracker = None if checkpoint is None else checkpoint.tracker(self.houses)
+        first_epoch = 0
+        if checkpoint is not None and 'epoch' in checkpoint.extra:
+            first_epoch = checkpoint.extra['epoch']
+            rng.bit_generator.state = checkpoint.extra['rng']
+        if tracker is not None and any(len(prior) != first_epoch for prior in tracker.prior):
+            print(f"The checkpoint {checkpoint.path} does not hold one cost per epoch, train again without --resume")
+            sys.exit(1)
+        costs = np.full((args.epochs - first_epoch, len(houses)), np.nan)
+        epochs = 0
+        for epoch in range(first_epoch, args.epochs):
+            lr = schedule(args.lr, epoch, args.lr_decay)
+            previous = theta.copy()
+            # Sum of the log-loss of the evaluated mini-batches of the epoch:
+            # mini-batches 0, cost_every, 2 * cost_every... counted from its start
+            cost, evaluated, batches = np.zeros(len(houses)), 0, 0
+            for chunk in self.read():
+                labels, features = self.clean(chunk)
+                x = design_matrix(self.scaler.transform(features))
+                y = (labels[:, None] == houses[None, :]).astype(np.float64)
+                order = rng.permutation(len(x))
+                for start in range(0, len(x), args.batch_size):
+                    batch = order[start:start + args.batch_size]
+                    x_batch, y_batch = x[batch], y[batch]
+                    p = sigmoid(x_batch @ theta)
+                    if args.cost_every > 0 and batches % args.cost_every == 0:
+                        cost += log_loss(y_batch, p)
+                        evaluated += 1
+                    batches += 1
+                    theta -= lr * (x_batch.T @ (p - y_batch)) / len(batch)
+                if tracker is not None and tracker.stopping():
+                    break
+            if tracker is not None and tracker.stopping():
+                theta = previous
+                break
+            if evaluated:
+                costs[epochs] = cost / evaluated
+            epochs += 1
+            converged = np.all(np.abs(theta - previous) < args.min_step_size)
+            if tracker is not None:
+                checkpoint.extra = {"epoch": epoch + 1, "rng": rng.bit_generator.state}
+                tracker.save(theta, costs[:epochs], epochs, converged or epoch + 1 == args.epochs)
+            if converged:
+                break
+        costs = costs[:epochs]
+        if tracker is not None:
+            costs = np.column_stack([tracker.history(k, costs[:, k]) for k in range(len(houses))])
+        self.costs = [(house, pd.DataFrame({"step": np.arange(len(costs)), "cost": costs[:, k]}))
+                      for k, house in enumerate(self.houses)]
+        return theta
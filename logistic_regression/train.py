@@ -1,91 +1,84 @@
 import pandas as pd
 import sys
 import numpy as np
-import math
-from utils.utils import get_mean, get_std, standarize
-
-# Small constant added to sigmoid outputs when computing log-loss
-# to avoid evaluating log(0), which tends to −∞ and breaks training.
-eps = 1e-15
+from logistic_regression.descent import softmax_gradient_descent, EarlyStopping, SOLVERS
+from logistic_regression.preprocessing import Preprocessing
+from logistic_regression.parallel import parallel_descent
+from logistic_regression.distributed import data_parallel_descent
 
 class Model():
     """
-    Logistic regression model using three numerical features.
+    Logistic regression model of a house, using any number of numerical
+    features.
 
-    This class extracts three selected features from a DataFrame, computes
-    their mean and standard deviation, standardizes the data, encodes the
-    target class as a binary variable, and trains logistic regression
+    The cleaning and standardization of the data are done once, by the
+    `Preprocessing` shared by the models of every house: a model only
+    encodes its house as the binary target and trains logistic regression
     parameters using gradient descent.
 
     Parameters
     ----------
-    df : pd.DataFrame
-        Input dataset containing the classifier column and the 3 selected features.
-    feature_1, feature_2, feature_3 : str
-        Names of the features to be used as predictors.
-    classifier : str
-        Column name representing the categorical target (houses).
+    data : Preprocessing
+        Cleaned features, houses and scaler of the training dataset.
     house : str
         The specific house to classify (positive class = 1).
 
     Notes
     -----
-    - All rows containing NaN values in the selected columns are removed.
-    - Means and standard deviations are precomputed for later standardization.
+    - `means` and `stds` are the ones of the scaler of `data`, one per
+    feature.
     - If any feature has standard deviation 0, training cannot proceed.
     """
-    def __init__(self, df:pd.DataFrame, feature_1:str, feature_2:str, feature_3:str, classifier:str, house:str):
+    def __init__(self, data:Preprocessing, house:str):
+        self.data = data
+        self.house = house
+        self.features = data.features
+
+    @property
+    def means(self):
+        return self.data.scaler.means.tolist()
+
+    @property
+    def stds(self):
+        return self.data.scaler.stds.tolist()
+
+    def standardized_matrix(self):
         """
-        Initialize the model by extracting and validating the required columns,
-        removing missing values, computing statistics (mean and std), and creating
-        the binary outcome column for the selected target house.
-
-        Raises
-        ------
-        Exception
-            If any of the requested columns does not exist or cannot be processed.
-        SystemExit
-            If initialization fails due to invalid input data.
+        Design matrix of the standardized features (see `design_matrix`),
+        shared by the models of every house. Exits if a feature has `std = 0`.
         """
-        self.feature_1 = feature_1
-        self.feature_2 = feature_2
-        self.feature_3 = feature_3
-        try:
-            self.df = df[[classifier, feature_1, feature_2, feature_3]]
-            df[self.feature_1] = pd.to_numeric(df[self.feature_1], errors="coerce")
-            df[self.feature_2] = pd.to_numeric(df[self.feature_2], errors="coerce")
-            df[self.feature_3] = pd.to_numeric(df[self.feature_3], errors="coerce")
-            self.df = self.df.dropna()
-            if self.df.empty:
-                print("No numeric values in data")
-                exit(1)
-            if self.df[self.feature_1].empty or self.df[self.feature_2].empty or self.df[self.feature_3].empty:
-                print("Empty column")
-                exit(1)
-            self.mean_1 = get_mean(self.df[self.feature_1])
-            self.mean_2 = get_mean(self.df[self.feature_2])
-            self.mean_3 = get_mean(self.df[self.feature_3])
-            self.std_1 = get_std(self.df[self.feature_1], self.mean_1)
-            self.std_2 = get_std(self.df[self.feature_2], self.mean_2)
-            self.std_3 = get_std(self.df[self.feature_3], self.mean_3)
-        except Exception as e:
-            print(f"An exception type {type(e).__name__} has ocurred, please check the input file and the features")
-            sys.exit(1)
-        if math.isnan(self.mean_1) or math.isnan(self.mean_2) or math.isnan(self.mean_3) \
-        or math.isnan(self.std_1) or math.isnan(self.std_2) or math.isnan(self.std_3):
-            print("Error: mean or std could not be computed. Column may contain non-numeric values.")
-            sys.exit(1)
-        self.df['outcome'] = (self.df[classifier] == house).astype(int)
+        return self.data.matrix()
 
+    def validation_split(self, x:np.ndarray, y:np.ndarray, args):
+        """
+        Holds out `args.validation` of the rows, at random (seed 0), for the
+        early stopping of gradient descent on their loss, with a patience of
+        `args.patience` cost evaluations.
 
-# Creo un dataframe con steps y costo porque a la mejor hace falta luego
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray, EarlyStopping | None]
+            The training rows of `x` and `y` and the early stopping, or `x`,
+            `y` and None without validation.
+        """
+        if args.validation == 0:
+            return x, y, None
+        held_out = int(round(len(x) * args.validation))
+        if held_out == 0 or held_out == len(x):
+            print("Not enough rows to hold out a validation split")
+            sys.exit(1)
+        order = np.random.default_rng(0).permutation(len(x))
+        train, validation = np.sort(order[held_out:]), np.sort(order[:held_out])
+        return x[train], y[train], EarlyStopping(x[validation], y[validation], args.patience)
 
-    def train(self, args):
+    def train(self, args, solver='gd', shards=1, transport='pipe', theta=None, checkpoint=None):
         """
-        Train the logistic regression model using gradient descent.
+        Train the logistic regression model using gradient descent, or
+        another optimizer of logistic_regression.descent.SOLVERS.
 
         The method:
-        - standardizes all three features,
+        - takes the standardized design matrix of the shared preprocessing,
+        - runs the solver on it; gradient descent at every step
         - computes the sigmoid prediction for each row,
         - evaluates the log-loss cost function,
         - computes partial derivatives,
@@ -102,66 +95,176 @@ class Model():
                 Maximum number of gradient descent iterations.
             - min_step_size : float
                 Minimum absolute update size for early stopping.
+            - cost_every : int
+                Steps between two evaluations of the cost (0: never).
+            - validation : float
+                Fraction of the rows held out to stop gradient descent when
+                their loss stops improving for `patience` evaluations of
+                the cost (0: no validation split).
+            - patience : int
+        solver : str
+            'gd' (gradient descent), 'newton' (Newton / IRLS) or 'lbfgs'.
+            Newton and L-BFGS do not use the learning rate.
+        shards : int
+            Worker processes the rows are split across for gradient descent,
+            0 for one per available core (see
+            logistic_regression.distributed).
+        transport : str
+            How the workers are reached: 'pipe' or 'socket'.
+        theta : np.ndarray, optional
+            Starting parameters (warm start), zeros by default.
+        checkpoint : logistic_regression.checkpoint.Checkpoint, optional
+            The solver saves the state of the house to it periodically and
+            stops early on SIGINT / SIGTERM. A resumed training runs at most
+            max_steps steps in total and its costs follow the saved ones.
 
         Returns
         -------
-        list[float]
-            A list `[θ0, θ1, θ2, θ3]` representing the trained parameters.
-            If standard deviation is zero for any feature, returns the initial
-            parameters without training.
+        np.ndarray
+            The trained parameters `[θ0, θ1, ...]`, one per feature after the
+            intercept.
 
         Notes
         -----
         - If any feature has `std = 0`, standardization is impossible and
-        training is aborted with a warning.
+        the program exits with a message (see `Preprocessing.matrix`).
         - Uses `eps` to avoid evaluating log(0) in the cost computation.
-        - Stores a DataFrame `df_cost` with (step, cost) to inspect convergence.
+        - Stores a DataFrame `df_cost` with (step, cost) to inspect convergence,
+        the cost being NaN on the steps it was not evaluated.
+        - Early stopping on a validation split is only done by single-process
+        gradient descent.
         """
-        theta = [0, 0, 0, 0]
         if args.lr <= 0 or args.max_steps <= 0 or args.min_step_size <= 0:
             print("Learning rate, max_steps and min_step_size must be positive numbers")
             exit(1)
-        if self.std_1 == 0 or self.std_2 == 0 or self.std_3 == 0:
-            print("Invalid data, standard desviation in a column is zero, cannot standardize")
-            sys.exit(1)
-        try:
-            self.df[f'{self.feature_1}_standarized'] = standarize(self.df[self.feature_1], self.mean_1, self.std_1)
-            self.df[f'{self.feature_2}_standarized'] = standarize(self.df[self.feature_2], self.mean_2, self.std_2)
-            self.df[f'{self.feature_3}_standarized'] = standarize(self.df[self.feature_3], self.mean_3, self.std_3)
-        except Exception as e:
-            print(f"An exception type {type(e).__name__} has ocurred, please check the input file and the features")
-            sys.exit(1)
-        cost = {}
-        for step in range(args.max_steps):
-            z = (theta[0]
-                + theta[1] * self.df[f'{self.feature_1}_standarized']
-                + theta[2] * self.df[f'{self.feature_2}_standarized']
-                + theta[3] * self.df[f'{self.feature_3}_standarized'])
-            # if z < 0 --> np.exp(-z) = np.exp(1000) -> INF -> overflow, np.exp(z) / (1 + np.exp(z) avoids the overflow
-            self.df['sigmoid'] = np.where(
-                z >= 0,
-                1 / (1 + np.exp(-z)),
-                np.exp(z) / (1 + np.exp(z))
-            )
-            
-            self.df['cost'] =(- self.df['outcome'] * np.log(self.df['sigmoid'] + eps)
-                            - (1 - self.df['outcome']) * np.log(1 - self.df['sigmoid'] + eps))
-            cost[step] = (self.df['cost'].sum() / self.df.__len__())
-            self.df['partial_lost_0'] = self.df['sigmoid'] - self.df['outcome']
-            self.df['partial_lost_1'] = (self.df['sigmoid'] - self.df['outcome']) * self.df[f'{self.feature_1}_standarized']
-            self.df['partial_lost_2'] = (self.df['sigmoid'] - self.df['outcome']) * self.df[f'{self.feature_2}_standarized']
-            self.df['partial_lost_3'] = (self.df['sigmoid'] - self.df['outcome']) * self.df[f'{self.feature_3}_standarized']
-            delta_0 = self.df['partial_lost_0'].sum() / self.df.__len__()
-            delta_1 = self.df['partial_lost_1'].sum() / self.df.__len__()
-            delta_2 = self.df['partial_lost_2'].sum() / self.df.__len__()
-            delta_3 = self.df['partial_lost_3'].sum() / self.df.__len__()
-            theta_new_0 = theta[0] - args.lr * delta_0
-            theta_new_1 = theta[1] - args.lr * delta_1
-            theta_new_2 = theta[2] - args.lr * delta_2
-            theta_new_3 = theta[3] - args.lr * delta_3
-            theta_new = [theta_new_0, theta_new_1, theta_new_2, theta_new_3]
-            if all(abs(theta_new[i] - theta[i]) < args.min_step_size for i in range(4)):
-                    break
-            theta = [theta_new[0], theta_new[1], theta_new[2], theta_new[3]]
-        self.df_cost = pd.DataFrame(cost.items(), columns=["step", "cost"])
-        return theta
\ No newline at end of file
+        x = self.standardized_matrix()
+        y = self.data.outcomes([self.house])[:, 0]
+        tracker = None if checkpoint is None else checkpoint.tracker([self.house])
+        max_steps = args.max_steps if tracker is None else int(tracker.steps_left(args.max_steps)[0])
+        if solver == 'gd' and shards != 1:
+            theta, cost, steps = data_parallel_descent(x, y, args.lr, max_steps, args.min_step_size, shards, transport, theta, tracker,
+                                                       args.cost_every)
+        elif solver == 'gd':
+            x, y, early_stopping = self.validation_split(x, y, args)
+            theta, cost, steps = SOLVERS[solver](x, y, args.lr, max_steps, args.min_step_size, theta, tracker,
+                                                 args.cost_every, early_stopping)
+        else:
+            theta, cost, steps = SOLVERS[solver](x, y, args.lr, max_steps, args.min_step_size, theta, tracker, args.cost_every)
+        cost = cost[:steps]
+        if tracker is not None:
+            if not tracker.stopping():
+                tracker.save(theta, cost, steps, True)
+            cost = tracker.history(0, cost)
+        self.df_cost = pd.DataFrame({"step": np.arange(len(cost)), "cost": cost})
+        return theta
+
+
+class MultiModel(Model):
+    """
+    All the one-vs-rest models of a dataset trained at once.
+
+    The models are the K columns of a (features + 1) x K theta matrix, so
+    every step is one pass over the data for all the houses instead of one
+    pass per house. Each column converges on its own, as the `Model` of its
+    house would (see logistic_regression.descent.gradient_descent).
+
+    Optionally, a true softmax (multinomial) model is trained instead of the
+    K independent binary ones (see `softmax_gradient_descent`). Its theta
+    columns are used like the one-vs-rest ones: the house with the largest
+    z = theta_0 + theta_1 * x_1 + ... is predicted.
+
+    Parameters
+    ----------
+    data : Preprocessing
+        Cleaned features, houses and scaler of the training dataset.
+    houses : list[str]
+        The houses to classify, one theta column each.
+    """
+    def __init__(self, data:Preprocessing, houses:list):
+        super().__init__(data, houses[0])
+        self.houses = houses
+        self.outcomes = data.outcomes(houses)
+
+    def train(self, args, softmax=False, jobs=1, solver='gd', shards=1, transport='pipe', theta=None, checkpoint=None):
+        """
+        Trains all the models with gradient descent.
+
+        The one-vs-all models can be trained concurrently, one house per
+        worker process, with the design matrix shared between them (see
+        logistic_regression.parallel).
+
+        Parameters
+        ----------
+        args : Namespace
+            lr, max_steps, min_step_size, cost_every, validation and
+            patience, as in `Model.train`. Only the one-vs-rest gradient
+            descent without shards holds out a validation split.
+        softmax : bool
+            Train a softmax model instead of the one-vs-rest ones.
+        jobs : int
+            Processes training the one-vs-rest models, 0 for one per
+            available core. Not used with `softmax`.
+        solver : str
+            Optimizer of the one-vs-rest models, as in `Model.train`. The
+            softmax model is trained with gradient descent.
+        shards, transport :
+            Data-parallel gradient descent of all the one-vs-rest models at
+            once, as in `Model.train`.
+        theta : np.ndarray, optional
+            Starting (features + 1, K) theta matrix (warm start), zeros by default.
+        checkpoint : logistic_regression.checkpoint.Checkpoint, optional
+            Checkpoint of the houses (or of the 'softmax' model), as in
+            `Model.train`. The steps it saved count towards max_steps.
+
+        Returns
+        -------
+        np.ndarray
+            Theta matrix of shape (features + 1, K), one column per house.
+
+        Notes
+        -----
+        - Stores in `costs` a list of (name, DataFrame with step and cost): one
+        per house, or a single 'softmax' entry.
+        """
+        if args.lr <= 0 or args.max_steps <= 0 or args.min_step_size <= 0:
+            print("Learning rate, max_steps and min_step_size must be positive numbers")
+            exit(1)
+        x = self.standardized_matrix()
+        if softmax:
+            tracker = None if checkpoint is None else checkpoint.tracker(['softmax'], whole=True)
+            max_steps = args.max_steps if tracker is None else int(tracker.steps_left(args.max_steps)[0])
+            theta, cost = softmax_gradient_descent(x, self.outcomes, args.lr, max_steps, args.min_step_size, theta, tracker,
+                                                   args.cost_every)
+            if tracker is not None:
+                if not tracker.stopping():
+                    tracker.save(theta, cost, len(cost), True)
+                cost = tracker.history(0, cost)
+            self.costs = [('softmax', pd.DataFrame({"step": np.arange(len(cost)), "cost": cost}))]
+            return theta
+        tracker = None if checkpoint is None else checkpoint.tracker(self.houses)
+        limits = np.full(len(self.houses), args.max_steps) if tracker is None else tracker.steps_left(args.max_steps)
+        if solver == 'gd' and shards != 1 and np.all(limits == limits[0]):
+            theta, cost, steps = data_parallel_descent(x, self.outcomes, args.lr, int(limits[0]), args.min_step_size, shards, transport,
+                                                       theta, tracker, args.cost_every)
+            costs = [cost[:steps[k], k] for k in range(len(self.houses))]
+        elif solver == 'gd' and shards != 1:
+            # Houses saved at different steps by a checkpoint: one descent each
+            results = [data_parallel_descent(x, self.outcomes[:, k], args.lr, int(limits[k]), args.min_step_size, shards, transport,
+                                             None if theta is None else theta[:, k], tracker.column(k), args.cost_every)
+                       for k in range(len(self.houses))]
+            theta = np.column_stack([theta for theta, _, _ in results])
+            costs = [cost[:steps] for _, cost, steps in results]
+        else:
+            y, early_stopping = self.outcomes, None
+            if solver == 'gd':
+                x, y, early_stopping = self.validation_split(x, y, args)
+            theta, costs = parallel_descent(x, y, args.lr, args.max_steps, args.min_step_size, jobs, solver, theta, tracker,
+                                            args.cost_every, early_stopping)
+        if tracker is not None:
+            if not tracker.stopping():
+                for k, cost in enumerate(costs):
+                    tracker.column(k).save(theta[:, k], cost, len(cost), True)
+            costs = [tracker.history(k, cost) for k, cost in enumerate(costs)]
+        self.costs = [(house, pd.DataFrame({"step": np.arange(len(cost)), "cost": cost}))
+                      for house, cost in zip(self.houses, costs)]
+        return theta
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import numpy as np
+from describe.accumulator import Moments
+from describe.state import file_fingerprint
+from logistic_regression.preprocessing import complete_rows, Scaler
+from utils.utils import read_chunks
+from utils import config
+
+# Rows read at a time when folding the rows appended to the training file
+APPEND_CHUNKSIZE = 100000
+
+
+def load_weights(path):
+    """
+    Loads the weights.json of a previous training run.
+
+    Returns:
+        tuple: (weights, started_from). `started_from` identifies the file
+            (absolute path and hash of its content) and is recorded in the new
+            weights.
+    """
+    try:
+        with open(path, 'rb') as jsonfile:
+            content = jsonfile.read()
+        weights = json.loads(content)
+        if not isinstance(weights, dict) or not weights:
+            raise ValueError("no houses")
+    except Exception as e:
+        print(f'An exception type {type(e).__name__} has ocurred, please check the json file {path}')
+        exit(1)
+    started_from = {"path": os.path.abspath(path), "fingerprint": hashlib.blake2b(content, digest_size=16).hexdigest()}
+    return weights, started_from
+
+
+def file_source(file_path):
+    """Training file as recorded in weights.json: path, bytes used and fingerprint."""
+    file_path = os.path.abspath(file_path)
+    size = os.path.getsize(file_path)
+    return {"path": file_path, "offset": size, "fingerprint": file_fingerprint(file_path, size)}
+
+
+def frame_moments(data):
+    """Moments of the features over the rows of a `Preprocessing`."""
+    moments = Moments(data.features)
+    moments.update(data.values)
+    return moments
+
+
+def appended_moments(weights, file_path, features, classifier):
+    """
+    Moments of the features over the whole training file, computed from the
+    sufficient statistics saved in `weights` plus the rows appended to the
+    file since, which are the only ones read.
+
+    Returns None when the weights hold no statistics of these features, when
+    the file is not the one they were trained on with rows appended
+    (different path, or the trained part of the file changed), or when no
+    row was appended.
+    """
+    entry = next(iter(weights.values()))
+    source, saved = entry.get("source"), entry.get("moments")
+    if not isinstance(source, dict) or not isinstance(saved, dict) or saved.get("columns") != features:
+        return None
+    file_path = os.path.abspath(file_path)
+    size = os.path.getsize(file_path)
+    if source.get("path") != file_path or source.get("offset", size + 1) >= size \
+        or file_fingerprint(file_path, source["offset"]) != source.get("fingerprint"):
+        return None
+    moments = Moments.from_dict(saved)
+    for chunk in read_chunks(file_path, APPEND_CHUNKSIZE, source["offset"], columns=[classifier] + features):
+        _, matrix = complete_rows(chunk, features, classifier)
+        moments.update(matrix)
+    return moments
+
+
+def apply_moments(data, moments):
+    """Standardizes the features of a `Preprocessing` with the means and (population) standard deviations of `moments`."""
+    data.standardize_with(Scaler.from_moments(moments))
+
+
+def starting_theta(weights, houses, features, means, stds):
+    """
+    Starting theta matrix (features + 1, K) of a warm start.
+
+    The saved parameters of each house apply to features standardized with
+    the saved means and stds. They are rewritten exactly for the new ones, so
+    every house starts from the same decision function it ended with:
+        theta_i' = theta_i * std_i' / std_i
+        theta_0' = theta_0 + sum(theta_i * (mean_i' - mean_i) / std_i)
+    Houses missing from the weights start at zero. The weights must have
+    been trained on the same `features` (weights.json files without the
+    list of their features were trained on the ones of utils/config.py).
+    """
+    means, stds = np.asarray(means, dtype=np.float64), np.asarray(stds, dtype=np.float64)
+    theta = np.zeros((len(means) + 1, len(houses)))
+    for k, house in enumerate(houses):
+        entry = weights.get(house)
+        if entry is None:
+            continue
+        if entry.get("features", config.features) != features:
+            print(f"The warm start weights of {house} were trained on other features: {entry.get('features', config.features)}")
+            exit(1)
+        try:
+            saved = np.array([entry[f'theta_{i}'] for i in range(len(means) + 1)], dtype=np.float64)
+            saved_means = np.asarray(entry['means'], dtype=np.float64)
+            saved_stds = np.asarray(entry['stds'], dtype=np.float64)
+            slopes = saved[1:] / saved_stds
+            theta[0, k] = saved[0] + slopes @ (means - saved_means)
+            theta[1:, k] = slopes * stds
+        except Exception as e:
+            print(f'An exception type {type(e).__name__} has ocurred, the warm start weights of {house} are invalid')
+            exit(1)
+    return theta
@@ -0,0 +1,115 @@
+"""
+Logistic Regression Cross-Validation
+====================================
+
+This script measures the quality of the one-vs-all logistic regression
+models with k-fold cross-validation, with our own `Model` training and no
+scikit-learn.
+
+Workflow
+--------
+1. Parse command-line arguments (dataset file, folds, training settings).
+2. Load the dataset, clean and standardize the features once.
+3. Assign the rows to the folds at random, once.
+4. For every fold, in parallel worker processes sharing the standardized
+   matrix: train the model of each house on the other folds and score it
+   on the fold.
+5. Print, for each house, the mean and standard deviation across the folds
+   of the accuracy, the log-loss and the training time, and the same for
+   the multi-class prediction (the house with the highest score).
+
+Command-line Arguments
+----------------------
+filename : str
+    Path to the dataset to load.
+
+--features, -f : str list, optional (default: config.features)
+    Features the models are trained on.
+
+--folds, -k : int, optional (default=5)
+    Number of folds.
+
+--seed : int, optional (default=0)
+    Seed of the assignment of the rows to the folds.
+
+--solver : str, optional (default=gd)
+    Optimizer of the models: 'gd', 'newton' or 'lbfgs' (see logreg_train.py).
+
+-lr : float, optional (default=0.01)
+    Learning rate of gradient descent.
+
+--max_steps, -ms : int, optional (default=15000)
+    Maximum number of steps of every model.
+
+--min_step_size, -mss : float, optional (default=0.00005)
+    Early stopping threshold.
+
+--jobs, -j : int, optional (default=0)
+    Worker processes running folds (0: one per available core).
+
+--cache : flag, optional
+    Keep the parsed dataset in a binary cache and memory-map it on later runs.
+
+--output, -o : str, optional
+    Also save the table of results to this CSV file.
+
+Notes
+-----
+The features are standardized once with the statistics of all the rows,
+so the folds share a single matrix: the held-out fold takes part in its
+means and standard deviations, which hardly matters at this scale.
+
+"""
+
+import argparse
+import signal
+import time
+from logistic_regression.cross_validation import cross_validate, summary
+from logistic_regression.descent import SOLVERS
+from logistic_regression.preprocessing import Preprocessing
+from utils.utils import read_file, termination_handler
+from utils import config
+
+def arguments_configuration():
+    parser = argparse.ArgumentParser(
+        prog='Logistic regression cross-validation',
+        description='Given a dataset path, the program will measure the multi-classifier model with k-fold cross-validation'
+    )
+
+    parser.add_argument('filename')
+    parser.add_argument('--features', '-f', nargs='+', default=config.features, help='Features the models are trained on')
+    parser.add_argument('--folds', '-k', default=5, type=int, help='Number of folds')
+    parser.add_argument('--seed', default=0, type=int, help='Seed of the assignment of the rows to the folds')
+
+    # Training of the models
+    parser.add_argument('--solver', default='gd', choices=sorted(SOLVERS), help='Optimizer: gradient descent (gd), Newton/IRLS (newton) or L-BFGS (lbfgs)')
+    parser.add_argument('-lr', default=0.01, type=float, help='Controls the magnitude of each gradient-descent update')
+    parser.add_argument('--max_steps', '-ms', default=15000, type=int, help='Maximum number of steps of every model')
+    parser.add_argument('--min_step_size', '-mss', default=0.00005, type=float, help='Minimum allowable step size')
+
+    parser.add_argument('--jobs', '-j', default=0, type=int, help='Worker processes running folds, 0 for one per available core')
+    parser.add_argument('--cache', action='store_true', help='Keep the parsed dataset in a binary cache and memory-map it on later runs')
+    parser.add_argument('--output', '-o', help='CSV file the table of results is saved to')
+
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    signal.signal(signal.SIGINT, termination_handler)
+    signal.signal(signal.SIGTERM, termination_handler)
+    args = arguments_configuration()
+
+    features = args.features
+    df = read_file(args.filename, args.cache, [config.target_label] + features, config.column_dtypes(features))
+    data = Preprocessing(df, features, config.target_label)
+    houses = data.houses
+    x = data.matrix()
+
+    start = time.perf_counter()
+    results = cross_validate(x, data.outcomes(houses), args.folds, args.solver, args.lr, args.max_steps, args.min_step_size, args.jobs, args.seed)
+    elapsed = time.perf_counter() - start
+
+    table = summary(houses, *results)
+    print(table.to_string(index=False))
+    print(f'{args.folds}-fold cross-validation of {len(x)} rows in {elapsed:.3f}s')
+    if args.output:
+        table.to_csv(args.output, index=False)
@@ -9,8 +9,8 @@ program.
 
 Main Features
 -------------
-- Reads a dataset containing the three required numerical features defined in
-  the `config` module.
+- Reads a dataset containing the numerical features the model was trained on
+  (saved in the JSON file, or the ones of the `config` module).
 - Loads the logistic regression model weights (θ, means, stds) from a JSON file.
 - Uses the function `Predict()` to compute class probabilities and assign the
   most probable house.
@@ -33,13 +33,29 @@ test_file : str
     If specified, compares the custom model against a scikit-learn model using
     the `compare_models()` function.
 
+--chunksize, -c : int, optional
+    Streaming mode: the test file is read, standardized and scored this many
+    rows at a time, and the predictions of every chunk are appended to
+    `houses.csv` right away, so memory stays flat whatever the size of the
+    file. The output is the same file, rows and index. Not compatible with
+    --test or --cache.
+
+--jobs, -j : int, optional (default=1)
+    Parallel mode: the rows of the test file are split into one byte range
+    per worker process (0: one per available core), aligned to line
+    boundaries. Every worker scores its range chunk by chunk (--chunksize
+    rows at a time, 100000 by default) and the parts are merged into
+    `houses.csv` in file order. Not compatible with --test or --cache.
+
 Behaviour
 ---------
 1. Handles SIGINT and SIGTERM to ensure a clean shutdown.
-2. Reads the test dataset using `read_file()`.
-3. Loads the model weights from the specified JSON file.
+2. Loads the model weights from the specified JSON file.
+3. Reads the features of the model from the test dataset using `read_file()`.
 4. Predicts the Hogwarts house for each row.
-5. Writes the results to `houses.csv`.
+5. Writes the results to `houses.csv` (with --chunksize, steps 3 to 5 run
+   on one chunk at a time; with --jobs, in parallel on byte ranges of the
+   file).
 6. If `--test` is passed:
        - Loads the training dataset.
        - Runs a comparison between the manual and scikit-learn implementations.
@@ -70,7 +86,8 @@ import argparse
 import signal
 import os
 from utils.utils import termination_handler, read_file
-from logistic_regression.predict import Predict
+from utils import config
+from logistic_regression.predict import Predict, read_weights, stream_predictions, parallel_predictions
 from test.prediction import compare_models
 
 def arguments_configuration():
@@ -83,6 +100,9 @@ def arguments_configuration():
     parser.add_argument('--jsonpath', default='weights.json', help='Path to json file gene3rated by trainer programm')
     parser.add_argument('--train_file', default='datasets/dataset_train.csv', help='Path to the train dataset')
     parser.add_argument('--test', '-t', action='store_true', help='Compare the results of the manual model to the scikit-learn mkodel')
+    parser.add_argument('--cache', action='store_true', help='Keep the parsed dataset in a binary cache and memory-map it on later runs')
+    parser.add_argument('--chunksize', '-c', type=int, help='Read, score and write the test file this many rows at a time')
+    parser.add_argument('--jobs', '-j', default=1, type=int, help='Worker processes scoring byte ranges of the test file, 0 for one per available core')
 
 
     return parser.parse_args()
@@ -97,10 +117,21 @@ if __name__ == "__main__":
     except Exception as e: 
         print(f'An exception type {type(e).__name__} has ocurred, please check the json file {args.jsonpath}')
 
-    df_predict = read_file(args.test_file)
-    prediction = Predict(df_predict, jsonpath)
+    weights = read_weights(jsonpath)
+    features = weights[1]
+    if args.chunksize is not None or args.jobs != 1:
+        if args.test or args.cache:
+            print("Streaming and parallel modes (--chunksize, --jobs) can not be used with --test or --cache")
+            exit(1)
+        if args.jobs != 1:
+            parallel_predictions(args.test_file, jsonpath, 'houses.csv', args.jobs, args.chunksize, weights)
+        else:
+            stream_predictions(args.test_file, jsonpath, 'houses.csv', args.chunksize, weights)
+        exit(0)
+    df_predict = read_file(args.test_file, args.cache, features, config.column_dtypes(features))
+    prediction = Predict(df_predict, jsonpath, weights)
     prediction.to_csv('houses.csv', index=True)
 
     if args.test:
-        df_train = read_file(args.train_file)
-        compare_models(df_predict, df_train, prediction)
\ No newline at end of file
+        df_train = read_file(args.train_file, args.cache, [config.target_label] + features, config.column_dtypes(features))
+        compare_models(df_predict, df_train, prediction, features)
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""
+Logistic Regression Hyperparameter Search
+=========================================
+
+This script tunes the learning rate, the maximum number of steps and the
+minimum step size of the one-vs-all gradient descent instead of running
+`logreg_train.py` once per guess.
+
+Workflow
+--------
+1. Parse command-line arguments (dataset file and values to try).
+2. Load the dataset and hold out a random validation split.
+3. Clean and standardize the features once (with the statistics of the
+   training rows) and place the matrices in shared memory.
+4. Build the configurations: every combination of the given values (grid),
+   or `--random` configurations drawn between their smallest and largest.
+5. Evaluate them with successive halving: every rung trains the surviving
+   configurations for more steps in parallel workers (all the houses at
+   once, as `logreg_train.py --multi_output`), scores them with the
+   validation log-loss and accuracy, and keeps the best 1 / eta of them.
+6. Save the weights of the best configuration and the results table.
+
+Command-line Arguments
+----------------------
+filename : str
+    Path to the dataset to load.
+
+--features, -f : str list, optional (default: config.features)
+    Features the models are trained on.
+
+--lr : float list, optional (default=0.001 0.01 0.1)
+    Learning rates to try.
+
+--max_steps, -ms : int list, optional (default=15000)
+    Maximum numbers of gradient descent steps to try.
+
+--min_step_size, -mss : float list, optional (default=0.00005)
+    Early stopping thresholds to try.
+
+--random : int, optional
+    Draw this many random configurations instead of the grid: lr and
+    min_step_size log-uniform, max_steps uniform, between the smallest and
+    largest of the values given for each.
+
+--seed : int, optional (default=0)
+    Seed of the validation split and of the random configurations.
+
+--validation : float, optional (default=0.2)
+    Fraction of the rows held out to score the configurations.
+
+--min_budget : int, optional (default=500)
+    Gradient descent steps of the first rung of successive halving.
+
+--eta : int, optional (default=3)
+    Every rung keeps 1 / eta of the configurations and runs eta times more
+    steps.
+
+--jobs, -j : int, optional (default=0)
+    Worker processes evaluating configurations (0: one per available core).
+
+--cache : flag, optional
+    Keep the parsed dataset in a binary cache and memory-map it on later runs.
+
+--output, -o : str, optional (default=search_weights.json)
+    Weights of the best configuration, trained on the training split, in
+    the weights.json format (usable with logreg_predict.py --jsonpath).
+
+--results : str, optional (default=search_results.csv)
+    Results table: every configuration with the rung it reached, its steps,
+    validation log-loss and accuracy, and training time.
+
+Output
+------
+The best configuration and the results table are printed, and saved to the
+--output and --results files.
+
+"""
+
+import argparse
+import signal
+import time
+from logistic_regression.search import SearchData, grid_configs, random_configs, successive_halving, results_table
+from utils.utils import read_file, write_json, termination_handler
+from utils import config
+
+def arguments_configuration():
+    parser = argparse.ArgumentParser(
+        prog='Logistic regression search',
+        description='Given a dataset path, the program will search the best hyperparameters of the multi-classifier model'
+    )
+
+    parser.add_argument('filename')
+    parser.add_argument('--features', '-f', nargs='+', default=config.features, help='Features the models are trained on')
+
+    # Values of the hyperparameters to try
+    parser.add_argument('--lr', nargs='+', default=[0.001, 0.01, 0.1], type=float, help='Learning rates to try')
+    parser.add_argument('--max_steps', '-ms', nargs='+', default=[15000], type=int, help='Maximum numbers of gradient-descent steps to try')
+    parser.add_argument('--min_step_size', '-mss', nargs='+', default=[0.00005], type=float, help='Minimum step sizes to try')
+    parser.add_argument('--random', type=int, help='Number of random configurations drawn within the given values, instead of the grid')
+    parser.add_argument('--seed', default=0, type=int, help='Seed of the validation split and of the random configurations')
+
+    # Evaluation
+    parser.add_argument('--validation', default=0.2, type=float, help='Fraction of the rows held out to score the configurations')
+    parser.add_argument('--min_budget', default=500, type=int, help='Gradient-descent steps of the first rung of successive halving')
+    parser.add_argument('--eta', default=3, type=int, help='Every rung keeps 1 / eta of the configurations')
+    parser.add_argument('--jobs', '-j', default=0, type=int, help='Worker processes evaluating configurations, 0 for one per available core')
+    parser.add_argument('--cache', action='store_true', help='Keep the parsed dataset in a binary cache and memory-map it on later runs')
+
+    # Outputs
+    parser.add_argument('--output', '-o', default='search_weights.json', help='Weights of the best configuration')
+    parser.add_argument('--results', default='search_results.csv', help='Table of the results of every configuration')
+
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    signal.signal(signal.SIGINT, termination_handler)
+    signal.signal(signal.SIGTERM, termination_handler)
+    args = arguments_configuration()
+    features = args.features
+
+    df = read_file(args.filename, args.cache, [config.target_label] + features, config.column_dtypes(features))
+    data = SearchData(df, features, config.target_label, args.validation, args.seed)
+    if args.random is not None:
+        if args.random <= 0:
+            print("random must be a positive number")
+            exit(1)
+        configs = random_configs(args.lr, args.max_steps, args.min_step_size, args.random, args.seed)
+    else:
+        configs = grid_configs(args.lr, args.max_steps, args.min_step_size)
+
+    start = time.perf_counter()
+    best, trials = successive_halving(data, configs, args.min_budget, args.eta, args.jobs)
+    elapsed = time.perf_counter() - start
+
+    table = results_table(trials)
+    print(table.to_string(index=False))
+    print(f'{len(trials)} configurations evaluated in {elapsed:.3f}s')
+    print(f'Best: lr={best.config["lr"]:g} max_steps={best.config["max_steps"]} '
+          f'min_step_size={best.config["min_step_size"]:g} '
+          f'(validation log-loss {best.log_loss:.6f}, accuracy {best.accuracy:.4f})')
+
+    weights = {}
+    for k, house in enumerate(data.houses):
+        weights[house] = {**{f"theta_{i}": theta for i, theta in enumerate(best.theta[:, k].tolist())},
+                          "means": data.means,
+                          "stds": data.stds,
+                          "features": data.features,
+                          "config": best.config}
+    write_json(args.output, weights)
+    table.to_csv(args.results, index=False)
@@ -0,0 +1,100 @@
+"""
+Logistic Regression – Prediction Server
+=======================================
+
+This script keeps a trained multiclass logistic regression model in memory
+and predicts the Hogwarts house of the rows it receives over HTTP, instead
+of starting a `logreg_predict.py` process (interpreter, imports, reading
+and validating the JSON file) for every prediction.
+
+Main Features
+-------------
+- Loads and validates the weights (θ, means, stds, features) once with
+  `read_weights()`, and keeps them as the arrays `Predict()` scores with.
+- Accepts single rows or batches of rows.
+- Groups the requests received at about the same time into micro-batches,
+  scored with a single matrix product.
+- Reloads the weights when the JSON file changes (e.g. after a new
+  `logreg_train.py` run), without restarting. A file that can not be loaded
+  is reported and the previous weights are kept.
+- Does not import scikit-learn nor the comparison tests.
+
+Command-line Arguments
+----------------------
+--jsonpath : str, optional (default: 'weights.json')
+    Path to the JSON file generated by the training script containing model weights.
+
+--host : str, optional (default: '127.0.0.1')
+    Address to listen on.
+
+--port, -p : int, optional (default=8000)
+    TCP port to listen on (0: any free port).
+
+--socket, -s : str, optional
+    Listen on this Unix socket instead of a TCP port.
+
+--max_rows : int, optional (default=4096)
+    Rows after which no more requests are added to a micro-batch.
+
+--max_wait : float, optional (default=0)
+    Milliseconds a micro-batch waits for more requests. With 0, a batch
+    takes only the requests already received, which adds no latency.
+
+Endpoints
+---------
+POST /predict
+    The body is a JSON row, an object mapping the features to their values:
+        {"Astronomy": -487.9, "Ancient Runes": 367.5, "Charms": -244.4}
+    answered with {"house": "Slytherin"}; or a list of rows (objects, or
+    lists of the values in the order of the features), also accepted as
+    {"rows": [...]}, answered with {"houses": [...]}. Missing or
+    non-numeric values give a null house, as empty cells in
+    `logreg_predict.py`.
+
+GET /model
+    Path, features, houses, means and stds of the weights in use, and the
+    number of micro-batches and requests scored.
+
+Errors are answered with their HTTP status and {"error": message}.
+
+Usage Example
+-------------
+    python3 logreg_serve.py --jsonpath weights.json --port 8000
+
+    curl -s localhost:8000/predict \
+        -d '{"Astronomy": -487.9, "Ancient Runes": 367.5, "Charms": -244.4}'
+
+"""
+
+import argparse
+import asyncio
+import os
+from logistic_regression.serve import ServedModel, serve
+
+def arguments_configuration():
+    parser = argparse.ArgumentParser(
+        prog='Logistic regression serve',
+        description='The program will keep the multi-classifier model loaded and predict the Howarts House of the rows it receives over HTTP'
+    )
+
+    parser.add_argument('--jsonpath', default='weights.json', help='Path to json file generated by trainer programm')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', '-p', default=8000, type=int, help='TCP port to listen on')
+    parser.add_argument('--socket', '-s', help='Unix socket to listen on instead of a TCP port')
+    parser.add_argument('--max_rows', default=4096, type=int, help='Rows after which no more requests are added to a micro-batch')
+    parser.add_argument('--max_wait', default=0.0, type=float, help='Milliseconds a micro-batch waits for more requests')
+
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = arguments_configuration()
+    if args.max_rows <= 0 or args.max_wait < 0:
+        print("max_rows must be a positive number and max_wait can not be negative")
+        exit(1)
+
+    model = ServedModel(os.path.abspath(args.jsonpath))
+    try:
+        asyncio.run(serve(model, args.host, args.port, args.socket, args.max_rows, args.max_wait / 1000))
+    except OSError as e:
+        print(f'An exception type {type(e).__name__} has ocurred, could not listen on {args.socket or f"{args.host}:{args.port}"}')
+        exit(1)
@@ -11,7 +11,8 @@ Workflow
 --------
 1. Parse command-line arguments (dataset file, learning rate, max steps, etc.).
 2. Load the dataset from the provided path.
-3. Identify the unique class labels in the target column.
+3. Clean and standardize the features once (a `Preprocessing` shared by
+   every model) and identify the unique class labels in the target column.
 4. For each class:
    - Initialize a `Model` instance configured for that class.
    - Train a logistic regression classifier with gradient descent.
@@ -25,6 +26,10 @@ Command-line Arguments
 filename : str
     Path to the dataset to load.
 
+--features, -f : str list, optional (default: config.features)
+    Features the models are trained on, any number of numeric columns of the
+    dataset. They are saved in weights.json, where prediction reads them.
+
 --max_steps, -ms : int, optional (default=15000)
     Maximum number of gradient descent iterations allowed during training.
 
@@ -35,12 +40,117 @@ filename : str
 -lr : float, optional (default=0.01)
     Learning rate controlling the magnitude of gradient descent updates.
 
+--multi_output : flag, optional
+    Train all the one-vs-all models at once: theta is a (features + 1) x K
+    matrix and every step is a single pass over the data for all the houses.
+    Each model still stops on its own, with the same result as when trained
+    alone.
+
+--softmax : flag, optional
+    Train a single softmax (multinomial) model over all the houses instead of
+    the one-vs-all models. weights.json keeps the same layout.
+
+--solver : str, optional (default=gd)
+    Optimizer of the one-vs-all models: batch gradient descent ('gd'),
+    Newton's method / IRLS ('newton') or L-BFGS ('lbfgs'). Newton and L-BFGS
+    do not use the learning rate and converge in tens of iterations instead
+    of thousands. The iterations run per house and the training wall time
+    are printed.
+
+--jobs, -j : int, optional (default=1)
+    Number of processes training the one-vs-all models concurrently, one
+    house each (0: one per available core; never more than the cores nor the
+    houses). The features are standardized once and the design matrix is
+    shared with the workers through shared memory.
+
+--shards : int, optional (default=1)
+    Data-parallel gradient descent: the rows are split across this many
+    worker processes (0: one per available core). Every step, each worker
+    returns the gradient and log-loss sums of its shard and the coordinator
+    reduces them and broadcasts the updated theta. With --multi_output, all
+    the houses share the same workers.
+
+--transport : str, optional (default=pipe)
+    How the data-parallel workers are reached: multiprocessing pipes
+    ('pipe') or a local TCP socket ('socket'), which stands in for workers
+    on other nodes.
+
+--warm_start, -ws : str, optional
+    Path to the weights.json of a previous run. Every house starts from its
+    saved parameters, rewritten exactly for the new means and stds, instead
+    of zero. When the training file is the previous one with rows appended,
+    the means and stds are updated from the sufficient statistics saved in
+    weights.json (count, mean, M2) and the appended rows only.
+
+--checkpoint : str, optional (default=checkpoint.json)
+    File the training state is saved to while training: the theta, steps run
+    and cost history of every house, written atomically. It is removed once
+    weights.json is written. On SIGINT / SIGTERM, the solvers stop at their
+    next step and the current state is saved before exiting (a second signal
+    exits right away).
+
+--checkpoint_every : int, optional (default=1000)
+    Steps of the batch solvers between two checkpoints (0: only save on
+    SIGINT / SIGTERM). Streaming mode saves at the end of every epoch.
+
+--resume : flag, optional
+    Continue the training saved in --checkpoint instead of starting over.
+    The training file and settings (features, solver, lr, min_step_size and
+    the streaming options) must be the ones of the interrupted run. Finished
+    houses are not trained again, the steps already run count towards
+    max_steps / epochs and the result is the one of an uninterrupted run
+    (L-BFGS restarts with an empty memory). Not available with --validation.
+
+--cost_every : int, optional (default=1)
+    Steps between two evaluations of the cost (the log-loss of the training
+    rows), which is only needed for the cost history and plot: on the other
+    steps it is not computed and recorded as NaN. 0 never evaluates it. In
+    streaming mode, mini-batches between two evaluations: the history keeps
+    one cost per epoch, the mean of its evaluated mini-batches.
+
+--validation : float, optional (default=0)
+    Fraction of the rows held out, at random, to stop the gradient descent
+    of each house when their log-loss stops improving; the house keeps the
+    parameters of its best validation loss, whether it stops on its
+    patience, on min_step_size or after max_steps. It is checked with the
+    cost, every --cost_every steps. One-vs-all gradient descent only
+    (without --softmax, --solver, --shards or --chunksize). The best losses
+    and parameters are not checkpointed, so it can not be used with --resume.
+
+--patience : int, optional (default=10)
+    Validation checks without improvement before a house stops.
+
+--chunksize, -c : int, optional
+    Streaming mode: the file is read this many rows at a time and never
+    loaded whole, so memory stays bounded on files of any size. A first pass
+    computes the means and standard deviations of the features, then the
+    one-vs-all models are trained with mini-batch stochastic gradient
+    descent. weights.json has the same format.
+
+--batch_size, -bs : int, optional (default=256)
+    Rows per mini-batch in streaming mode.
+
+--epochs, -e : int, optional (default=10)
+    Passes over the file in streaming mode. Training also stops when no
+    parameter moved more than min_step_size during an epoch.
+
+--lr_schedule : str, optional (default=constant)
+    Learning rate of each epoch in streaming mode: 'constant', 'inverse'
+    (lr / (1 + lr_decay * epoch)) or 'exponential' (lr * lr_decay ** epoch).
+
+--lr_decay : float, optional (default=0.5)
+    Decay of the inverse and exponential schedules.
+
 Output
 ------
 weights.json
     JSON file containing learned model parameters for each class, including:
-    - theta values (θ0, θ1, θ2, θ3)
+    - theta values (θ0, θ1, ... one per feature after the intercept)
     - means and standard deviations of the features used for normalization
+    - the features, in the order of their theta values
+    - sufficient statistics of the features (moments) and the training file
+      (source), used by later warm starts
+    - the weights.json the run started from (warm_start), or null
 
 Plots
 -----
@@ -51,10 +161,18 @@ during training.
 
 import argparse
 import signal
-import json
+import time
+import numpy as np
+import pandas as pd
 import matplotlib.pyplot as ptl
-from logistic_regression.train import Model
-from utils.utils import read_file, termination_handler
+from logistic_regression.train import Model, MultiModel
+from logistic_regression.preprocessing import Preprocessing
+from logistic_regression.descent import SOLVERS
+from logistic_regression.streaming import StreamingModel, LR_SCHEDULES
+from logistic_regression.distributed import TRANSPORTS
+from logistic_regression.checkpoint import Checkpoint, CHECKPOINT_EVERY
+from logistic_regression.warm_start import load_weights, appended_moments, apply_moments, starting_theta, frame_moments, file_source
+from utils.utils import read_file, write_json, GracefulStop
 from utils import config
 
 def arguments_configuration():
@@ -64,14 +182,84 @@ def arguments_configuration():
     )
 
     parser.add_argument('filename')
+    parser.add_argument('--features', '-f', nargs='+', default=config.features, help='Features the models are trained on')
 
     # Hiperparameters of logistic regression model
     parser.add_argument('--max_steps', '-ms', default=15000, type=int, help='Maximum number of gradient-descent iterations allowed during training')
     parser.add_argument('--min_step_size', '-mss', default=0.00005, type=int, help='Minimum allowable gradient-descent step size')
     parser.add_argument('-lr', default=0.01, type=float, help='Controls the magnitude of each gradient-descent update')
+    parser.add_argument('--cache', action='store_true', help='Keep the parsed dataset in a binary cache and memory-map it on later runs')
+    parser.add_argument('--multi_output', action='store_true', help='Train all the houses at once, as the columns of a single theta matrix')
+    parser.add_argument('--softmax', action='store_true', help='Train a single softmax model over all the houses instead of one-vs-all models')
+    parser.add_argument('--solver', default='gd', choices=sorted(SOLVERS), help='Optimizer: gradient descent (gd), Newton/IRLS (newton) or L-BFGS (lbfgs)')
+    parser.add_argument('--jobs', '-j', default=1, type=int, help='Processes training the houses concurrently, 0 for one per available core')
+    parser.add_argument('--shards', default=1, type=int, help='Processes the rows are split across for data-parallel gradient descent, 0 for one per available core')
+    parser.add_argument('--transport', default='pipe', choices=sorted(TRANSPORTS), help='How the data-parallel workers are reached: multiprocessing pipes or a local socket')
+    parser.add_argument('--warm_start', '-ws', help='weights.json of a previous run to start from instead of zero')
+    parser.add_argument('--checkpoint', default='checkpoint.json', help='File the training state is saved to while training')
+    parser.add_argument('--checkpoint_every', default=CHECKPOINT_EVERY, type=int, help='Steps between two checkpoints, 0 to only save on SIGINT / SIGTERM')
+    parser.add_argument('--resume', action='store_true', help='Continue the training saved in the checkpoint')
+    parser.add_argument('--cost_every', default=1, type=int, help='Steps between two evaluations of the cost, 0 to never evaluate it')
+    parser.add_argument('--validation', default=0, type=float, help='Fraction of the rows held out to stop each house when their loss stops improving')
+    parser.add_argument('--patience', default=10, type=int, help='Validation checks without improvement before a house stops')
+
+    # Streaming mini-batch SGD
+    parser.add_argument('--chunksize', '-c', type=int, help='Read the file in chunks of this many rows and train with mini-batch SGD')
+    parser.add_argument('--batch_size', '-bs', default=256, type=int, help='Rows per mini-batch in streaming mode')
+    parser.add_argument('--epochs', '-e', default=10, type=int, help='Passes over the file in streaming mode')
+    parser.add_argument('--lr_schedule', default='constant', choices=sorted(LR_SCHEDULES), help='Learning rate of each epoch in streaming mode')
+    parser.add_argument('--lr_decay', default=0.5, type=float, help='Decay of the inverse and exponential learning rate schedules')
 
     return parser.parse_args()
 
+def house_weights(theta:list, model, extra:dict):
+    """
+    Entry of a house in weights.json: its theta, the standardization of the
+    features and the `extra` fields (sufficient statistics and origin).
+    """
+    return {**{f"theta_{i}": value for i, value in enumerate(theta)},
+            "means": list(model.means),
+            "stds": list(model.stds),
+            "features": model.features,
+            **extra,
+            }
+
+def checkpoint_settings(args, features:list):
+    """Settings of the training a checkpoint can only be resumed with."""
+    settings = {"features": features, "lr": args.lr, "min_step_size": args.min_step_size}
+    if args.validation:
+        settings = {**settings, "validation": args.validation, "patience": args.patience}
+    if args.chunksize is not None:
+        return {**settings, "solver": "sgd", "chunksize": args.chunksize, "batch_size": args.batch_size,
+                "lr_schedule": args.lr_schedule, "lr_decay": args.lr_decay}
+    return {**settings, "solver": "softmax" if args.softmax else args.solver}
+
+def resumed_theta(checkpoint:Checkpoint, houses:list, initial):
+    """
+    Starting theta matrix of the houses: the one saved in the checkpoint, or
+    else `initial` (warm start) or zeros.
+    """
+    theta = np.zeros((len(checkpoint.settings["features"]) + 1, len(houses))) if initial is None else np.array(initial, dtype=np.float64)
+    for k, house in enumerate(houses):
+        saved = checkpoint.theta(house)
+        if saved is not None:
+            theta[:, k] = saved
+    return theta
+
+def finished(checkpoint:Checkpoint, name:str, max_steps:int):
+    """Whether a model of the checkpoint converged or ran out of steps."""
+    return checkpoint.done(name) or len(checkpoint.costs(name)) >= max_steps
+
+def saved_costs(checkpoint:Checkpoint, name:str):
+    cost = checkpoint.costs(name)
+    return (name, pd.DataFrame({"step": np.arange(len(cost)), "cost": cost}))
+
+def print_training(solver:str, costs:list, elapsed:float):
+    """Reports the iterations run by every model and the training wall time."""
+    for house, df_cost in costs:
+        print(f'{house}: {len(df_cost)} iterations')
+    print(f'Solver {solver}: trained in {elapsed:.3f}s')
+
 def plot_costs(costs:list):
     ptl.rcParams["figure.figsize"] = (25, 10)
 
@@ -80,6 +268,7 @@ def plot_costs(costs:list):
 
     for i, (house, df_cost) in enumerate(costs):
         ptl.subplot(1,num_models, i + 1)
+        df_cost = df_cost.dropna()
         ptl.plot(df_cost['step'], df_cost['cost'])
         ptl.title(house)
         ptl.xlabel('step')
@@ -89,29 +278,121 @@ def plot_costs(costs:list):
     ptl.show()
 
 if __name__ == "__main__":
-    signal.signal(signal.SIGINT, termination_handler)
-    signal.signal(signal.SIGTERM, termination_handler)
+    signal.signal(signal.SIGINT, GracefulStop.handler)
+    signal.signal(signal.SIGTERM, GracefulStop.handler)
     args = arguments_configuration()
-    df = read_file(args.filename)
-    houses = df[config.target_label].unique().tolist()
     weights = {}
     costs = []
-    for house in houses:
-        a = Model(df, config.feature_1, config.feature_2, config.feature_3, config.target_label, house)
-        theta = a.train(args)
-        costs.append((house, a.df_cost))
-        means = [a.mean_1, a.mean_2, a.mean_3]
-        stds = [a.std_1, a.std_2, a.std_3]
-        weights[house] = {"theta_0": theta[0],
-                          "theta_1": theta[1],
-                          "theta_2": theta[2],
-                          "theta_3": theta[3],
-                          "means": [a.mean_1, a.mean_2, a.mean_3],
-                          "stds": [a.std_1, a.std_2, a.std_3],
-                        #   "features": [FEATURE_1, FEATURE_2, FEATURE_3]
-                        }
-
-    with open('weights.json', 'w') as jsonfile:
-        json.dump(weights, jsonfile)
+    if args.jobs < 0 or args.shards < 0:
+        print("jobs and shards can not be negative")
+        exit(1)
+    if args.softmax and args.solver != 'gd':
+        print("The softmax model can only be trained with gradient descent (--solver gd)")
+        exit(1)
+    if args.chunksize is not None and (args.softmax or args.solver != 'gd' or args.jobs != 1 or args.shards != 1):
+        print("Streaming mode (--chunksize) trains one-vs-all models with mini-batch SGD, without --softmax, --solver, --jobs or --shards")
+        exit(1)
+    if args.shards != 1 and (args.softmax or args.solver != 'gd' or args.jobs != 1):
+        print("Data-parallel training (--shards) runs one-vs-all gradient descent, without --softmax, --solver or --jobs")
+        exit(1)
+    if args.cost_every < 0 or not 0 <= args.validation < 1 or args.patience < 0:
+        print("cost_every and patience can not be negative and validation must be between 0 and 1")
+        exit(1)
+    if args.validation and (args.softmax or args.solver != 'gd' or args.shards != 1 or args.chunksize is not None):
+        print("Early stopping on a validation split (--validation) runs one-vs-all gradient descent, without --softmax, --solver, --shards or --chunksize")
+        exit(1)
+    if args.validation and args.cost_every == 0:
+        print("Early stopping on a validation split (--validation) needs the cost to be evaluated (--cost_every)")
+        exit(1)
+    if args.validation and args.resume:
+        print("Early stopping on a validation split (--validation) can not be resumed (--resume), train again without it")
+        exit(1)
+    features = args.features
+    previous, started_from, moments = None, None, None
+    if args.warm_start:
+        previous, started_from = load_weights(args.warm_start)
+        print(f'Warm start from {started_from["path"]}')
+    settings, source = checkpoint_settings(args, features), file_source(args.filename)
+    if args.resume:
+        checkpoint = Checkpoint.resume(args.checkpoint, settings, source, args.checkpoint_every)
+        print(f'Resuming from {args.checkpoint}')
+    else:
+        checkpoint = Checkpoint(args.checkpoint, settings, source, args.checkpoint_every)
+    start = time.perf_counter()
+    if args.chunksize is not None:
+        args.solver = 'sgd'
+        a = StreamingModel(args.filename, features, config.target_label, args.chunksize)
+        houses = a.houses
+        moments = a.moments
+        initial = starting_theta(previous, houses, features, a.means, a.stds) if previous else None
+        if all(checkpoint.done(house) for house in houses):
+            theta = resumed_theta(checkpoint, houses, initial)
+            costs = [saved_costs(checkpoint, house) for house in houses]
+        else:
+            theta = a.train(args, theta=resumed_theta(checkpoint, houses, initial), checkpoint=checkpoint)
+            costs = a.costs
+    else:
+        df = read_file(args.filename, args.cache, [config.target_label] + features, config.column_dtypes(features))
+        # Cleaned and standardized once for all the models
+        data = Preprocessing(df, features, config.target_label)
+        houses = data.houses
+        if previous:
+            moments = appended_moments(previous, args.filename, features, config.target_label)
+            if moments is not None:
+                print('Means and stds updated with the rows appended since the warm start model')
+                apply_moments(data, moments)
+        if args.softmax:
+            a = MultiModel(data, houses)
+            initial = starting_theta(previous, houses, features, a.means, a.stds) if previous else None
+            if finished(checkpoint, 'softmax', args.max_steps):
+                theta = checkpoint.theta('softmax')
+                costs = [saved_costs(checkpoint, 'softmax')]
+            else:
+                if checkpoint.theta('softmax') is not None:
+                    initial = checkpoint.theta('softmax')
+                theta = a.train(args, True, theta=initial, checkpoint=checkpoint)
+                costs = a.costs
+        elif args.multi_output or args.jobs != 1:
+            todo = [house for house in houses if not finished(checkpoint, house, args.max_steps)]
+            a = MultiModel(data, todo or houses)
+            initial = starting_theta(previous, houses, features, a.means, a.stds) if previous else None
+            theta = resumed_theta(checkpoint, houses, initial)
+            trained = {}
+            if todo:
+                columns = [houses.index(house) for house in todo]
+                theta[:, columns] = a.train(args, False, args.jobs, args.solver, args.shards, args.transport, theta[:, columns], checkpoint)
+                trained = dict(a.costs)
+            costs = [(house, trained[house]) if house in trained else saved_costs(checkpoint, house) for house in houses]
+        else:
+            theta = np.zeros((len(features) + 1, len(houses)))
+            for k, house in enumerate(houses):
+                a = Model(data, house)
+                initial = starting_theta(previous, [house], features, a.means, a.stds) if previous else None
+                initial = resumed_theta(checkpoint, [house], initial)
+                if finished(checkpoint, house, args.max_steps):
+                    theta[:, k] = initial[:, 0]
+                    costs.append(saved_costs(checkpoint, house))
+                    continue
+                theta[:, k] = a.train(args, args.solver, args.shards, args.transport, initial[:, 0], checkpoint)
+                costs.append((house, a.df_cost))
+                if GracefulStop.requested():
+                    break
+        if moments is None:
+            moments = frame_moments(data)
+    if GracefulStop.requested():
+        if args.validation:
+            print('Training stopped: runs with --validation can not be resumed')
+            exit(0)
+        checkpoint.write()
+        print(f'Training stopped, its state is saved in {args.checkpoint}: run again with --resume to continue it')
+        exit(0)
+    # Sufficient statistics and origin of the model, for later warm starts
+    extra = {"moments": moments.to_dict(), "source": source, "warm_start": started_from}
+    for k, house in enumerate(houses):
+        weights[house] = house_weights(theta[:, k].tolist(), a, extra)
+    print_training(args.solver, costs, time.perf_counter() - start)
+
+    write_json('weights.json', weights)
+    checkpoint.remove()
 
     plot_costs(costs)
\ No newline at end of file
@@ -50,6 +50,7 @@ def arguments_configuration():
     )
 
     parser.add_argument('filename')
+    parser.add_argument('--cache', action='store_true', help='Keep the parsed dataset in a binary cache and memory-map it on later runs')
 
     return parser.parse_args()
 
@@ -58,5 +59,5 @@ if __name__ == "__main__":
     signal.signal(signal.SIGINT, termination_handler)
     signal.signal(signal.SIGTERM, termination_handler)
     args = arguments_configuration()
-    df = read_file(args.filename)
+    df = read_file(args.filename, args.cache)
     pair_plot(df)
\ No newline at end of file
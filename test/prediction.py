@@ -22,28 +22,21 @@ def percentage_outcomes(y, y_train, y_val):
     print(f"Ravenclaw: {(y_val[config.target_label] == 'Ravenclaw').sum() * 100 / len(y_val)}%") 
     print(f"Slytherin: {(y_val[config.target_label] == 'Slytherin').sum() * 100 / len(y_val)}%")
 
-def features_range(x_train, x_val, x_test):
-    print(f"Range {config.feature_1}:")
-    print(f"In x_train --> min: {x_train[config.feature_1].min()} - max: {x_train[config.feature_1].max()}")
-    print(f"In x_val --> min: {x_val[config.feature_1].min()} - max: {x_val[config.feature_1].max()}")
-    print(f"In x_test --> min: {x_test[config.feature_1].min()} - max: {x_test[config.feature_1].max()}")
-    print(f"Range {config.feature_2}:")
-    print(f"In x_train --> min: {x_train[config.feature_2].min()} - max: {x_train[config.feature_2].max()}")
-    print(f"In x_val --> min: {x_val[config.feature_2].min()} - max: {x_val[config.feature_2].max()}")
-    print(f"In x_test --> min: {x_test[config.feature_2].min()} - max: {x_test[config.feature_2].max()}")
-    print(f"Range {config.feature_3}:")
-    print(f"In x_train --> min: {x_train[config.feature_3].min()} - max: {x_train[config.feature_3].max()}")
-    print(f"In x_val --> min: {x_val[config.feature_3].min()} - max: {x_val[config.feature_3].max()}")
-    print(f"In x_test --> min: {x_test[config.feature_3].min()} - max: {x_test[config.feature_3].max()}")
+def features_range(x_train, x_val, x_test, features=config.features):
+    for feature in features:
+        print(f"Range {feature}:")
+        print(f"In x_train --> min: {x_train[feature].min()} - max: {x_train[feature].max()}")
+        print(f"In x_val --> min: {x_val[feature].min()} - max: {x_val[feature].max()}")
+        print(f"In x_test --> min: {x_test[feature].min()} - max: {x_test[feature].max()}")
 
-def compare_models(df_predict:pd.DataFrame, df_train:pd.DataFrame, prediction):
-    df_train = df_train[[config.feature_1, config.feature_2, config.feature_3, config.target_label]].dropna()
-    x = df_train[[config.feature_1, config.feature_2, config.feature_3]]
+def compare_models(df_predict:pd.DataFrame, df_train:pd.DataFrame, prediction, features=config.features):
+    df_train = df_train[features + [config.target_label]].dropna()
+    x = df_train[features]
     y = df_train[[config.target_label]]
     houses = df_train[config.target_label].unique()
     original_index = df_predict.index.copy()
     x_train, x_val, y_train, y_val = train_test_split(x, y, test_size=0.3, random_state=42)
-    x_test = df_predict[[config.feature_1, config.feature_2, config.feature_3]].dropna()
+    x_test = df_predict[features].dropna()
     clean_index = x_test.index
     scaler = StandardScaler()
     x_train_s = scaler.fit_transform(x_train)
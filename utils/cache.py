@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Where parsed datasets are kept, and how much disk they may use in total.
+# Both can be changed with environment variables.
+CACHE_DIR = os.environ.get('DSLR_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'dslr'))
+CACHE_MAX_BYTES = int(os.environ.get('DSLR_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+
+# Bytes hashed at the start and at the end of the CSV file for the content
+# part of the key (hashing the whole file would cost a full read every run)
+SAMPLE_BYTES = 1024 ** 2
+
+META_FILE = 'meta.json'
+
+
+def content_hash(file_path, size):
+    """Hashes the size and the first and last SAMPLE_BYTES bytes of the file."""
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(file_path, 'rb') as file:
+        digest.update(file.read(SAMPLE_BYTES))
+        if size > SAMPLE_BYTES:
+            file.seek(max(SAMPLE_BYTES, size - SAMPLE_BYTES))
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def cache_key(file_path):
+    """
+    Key of a CSV file in the cache: a hash of its absolute path, size,
+    modification time and content hash. Any change to the file gives a new key.
+    """
+    file_path = os.path.abspath(file_path)
+    stat = os.stat(file_path)
+    parts = [file_path, str(stat.st_size), str(stat.st_mtime_ns), content_hash(file_path, stat.st_size)]
+    return hashlib.blake2b('|'.join(parts).encode(), digest_size=16).hexdigest(), file_path
+
+
+def entries():
+    """Existing cache entries as (directory, meta) pairs."""
+    if not os.path.isdir(CACHE_DIR):
+        return []
+    found = []
+    for name in os.listdir(CACHE_DIR):
+        if name.startswith('.'):
+            # Entry being written by store()
+            continue
+        directory = os.path.join(CACHE_DIR, name)
+        try:
+            with open(os.path.join(directory, META_FILE), 'r') as meta_file:
+                found.append((directory, json.load(meta_file)))
+        except (OSError, ValueError):
+            continue
+    return found
+
+
+def entry_size(directory):
+    return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+
+
+def evict(max_bytes=None):
+    """
+    Removes least recently used entries until the cache uses at most
+    `max_bytes` (default CACHE_MAX_BYTES). Every hit refreshes the
+    modification time of the entry's meta file, which orders the entries.
+    """
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    cached = []
+    for directory, _ in entries():
+        last_used = os.path.getmtime(os.path.join(directory, META_FILE))
+        cached.append((last_used, entry_size(directory), directory))
+    total = sum(size for _, size, _ in cached)
+    for _, size, directory in sorted(cached):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(directory, ignore_errors=True)
+        total -= size
+
+
+def load(file_path, columns=None):
+    """
+    Returns the cached DataFrame of a CSV file, or None on a miss.
+
+    Numeric columns are memory-mapped copy-on-write from their .npy files:
+    nothing is parsed nor copied up front, and writes to the DataFrame never
+    reach the cache. Text columns are rebuilt from their codes and categories.
+    With `columns`, only those columns are mapped.
+    """
+    key, _ = cache_key(file_path)
+    directory = os.path.join(CACHE_DIR, key)
+    meta_path = os.path.join(directory, META_FILE)
+    try:
+        with open(meta_path, 'r') as meta_file:
+            meta = json.load(meta_file)
+    except (OSError, ValueError):
+        return None
+    wanted = meta['columns'] if columns is None else [column for column in meta['columns'] if column['name'] in columns]
+    data = {column['name']: load_column(directory, column) for column in wanted}
+    index = pd.Index(load_column(directory, meta['index']), name=meta['index']['name'])
+    os.utime(meta_path)
+    return pd.DataFrame(data, index=index, copy=False)
+
+
+def load_column(directory, column):
+    if column['kind'] == 'numeric':
+        return np.load(os.path.join(directory, column['file']), mmap_mode='c')
+    codes = np.load(os.path.join(directory, column['file']))
+    categories = np.array(column['categories'] + [np.nan], dtype=object)
+    # Code -1 (missing value) picks the trailing NaN
+    return categories[codes]
+
+
+def store(file_path, df: pd.DataFrame):
+    """
+    Writes a parsed CSV file to the cache, replacing older entries of the same
+    path, then evicts entries over the size budget. Files larger than the
+    budget are not cached. Errors are ignored: the cache is only a shortcut.
+    """
+    try:
+        key, file_path = cache_key(file_path)
+        directory = os.path.join(CACHE_DIR, key)
+        if os.path.isdir(directory):
+            return
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_directory = tempfile.mkdtemp(dir=CACHE_DIR, prefix='.tmp_')
+        try:
+            meta = {
+                'path': file_path,
+                'rows': len(df),
+                'index': store_column(tmp_directory, 'index', df.index.name, df.index.to_numpy()),
+                'columns': [store_column(tmp_directory, f'column_{i}', name, df[name].to_numpy())
+                            for i, name in enumerate(df.columns)],
+            }
+            if entry_size(tmp_directory) > CACHE_MAX_BYTES:
+                return
+            with open(os.path.join(tmp_directory, META_FILE), 'w') as meta_file:
+                json.dump(meta, meta_file)
+            # Older entries of the same file are stale from now on
+            for old_directory, old_meta in entries():
+                if old_meta.get('path') == file_path:
+                    shutil.rmtree(old_directory, ignore_errors=True)
+            os.replace(tmp_directory, directory)
+        finally:
+            shutil.rmtree(tmp_directory, ignore_errors=True)
+        evict()
+    except OSError:
+        pass
+
+
+def store_column(directory, file_name, name, values: np.ndarray):
+    if values.dtype.kind in 'biuf':
+        np.save(os.path.join(directory, f'{file_name}.npy'), values)
+        return {'name': name, 'kind': 'numeric', 'file': f'{file_name}.npy'}
+    codes, categories = pd.factorize(values, use_na_sentinel=True)
+    np.save(os.path.join(directory, f'{file_name}.npy'), codes.astype(np.int32))
+    return {'name': name, 'kind': 'text', 'file': f'{file_name}.npy', 'categories': [str(c) for c in categories]}
@@ -1,4 +1,14 @@
 target_label = "Hogwarts House"
-feature_1 = "Astronomy"
-feature_2 = "Ancient Runes"
-feature_3 = "Charms"
\ No newline at end of file
+# Features the models are trained on by default (theta_1, theta_2... in this
+# order); logreg_train.py --features overrides them
+features = ["Astronomy", "Ancient Runes", "Charms"]
+
+# Types the columns are parsed with by read_file (float32 halves the memory of
+# the features, at the cost of precision)
+features_dtype = "float64"
+
+def column_dtypes(features:list):
+    """Types of the house and of the given feature columns, for read_file."""
+    return {target_label: "category", **{feature: features_dtype for feature in features}}
+
+dtypes = column_dtypes(features)
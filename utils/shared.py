@@ -0,0 +1,71 @@
+import os
+import numpy as np
+from multiprocessing import shared_memory
+
+
+def available_cpus():
+    """Number of CPU cores this process is allowed to run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def worker_count(requested, tasks):
+    """
+    Resolves a --workers / --jobs value: 0 means one worker per available
+    core. The result never exceeds the number of tasks nor the cores.
+    """
+    workers = available_cpus() if requested == 0 else min(requested, available_cpus())
+    return max(1, min(workers, tasks))
+
+
+class SharedArray():
+    """
+    A NumPy array stored in a named shared memory block, so worker processes
+    can map it instead of receiving a pickled copy.
+
+    The creating process owns the block and must call `close()` (or use the
+    object as a context manager) to free it. Workers receive `spec`, a small
+    picklable tuple, and call `SharedArray.attach(spec)`.
+
+    Usage Example:
+        with SharedArray(matrix) as shared:
+            pool.submit(work, shared.spec, ...)
+
+        def work(spec, ...):
+            shm, matrix = SharedArray.attach(spec)
+            ...
+            shm.close()
+    """
+    def __init__(self, array: np.ndarray):
+        order = 'F' if array.flags.f_contiguous and not array.flags.c_contiguous else 'C'
+        self.shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.array = np.ndarray(array.shape, dtype=array.dtype, buffer=self.shm.buf, order=order)
+        self.array[...] = array
+        self.spec = (self.shm.name, array.shape, array.dtype.str, order)
+
+    @staticmethod
+    def attach(spec):
+        """
+        Maps a shared array created by another process.
+
+        Returns:
+            tuple: (shm, array). Call `shm.close()` when done with `array`.
+        """
+        name, shape, dtype, order = spec
+        # Workers started by multiprocessing share the owner's resource
+        # tracker, which releases the block if the owner dies without close()
+        shm = shared_memory.SharedMemory(name=name)
+        return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, order=order)
+
+    def close(self):
+        del self.array
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,9 +1,45 @@
 import pandas as pd
+import tempfile
+import io
+import json
 import sys
+import os
+import multiprocessing
+from utils import cache as dataset_cache
 
-def read_file(file_path):
+def read_file(file_path, cache=False, columns=None, dtype=None):
+    """
+    Reads a CSV file into a DataFrame indexed by its first column.
+
+    With `columns`, only the index and those columns are parsed (requested
+    columns missing from the file are left out). `dtype` maps column names to
+    the types they are parsed with, e.g. config.dtypes; a column whose values
+    do not fit its type (a text value in a float column) keeps the inferred
+    type, so callers can still coerce and report it.
+
+    With `cache`, the parsed columns are kept in a binary columnar cache (see
+    utils/cache.py): later reads of the unchanged file memory-map them
+    instead of parsing the CSV again.
+    """
     try:
-        df = pd.read_csv(file_path, index_col=0)
+        if cache:
+            df = dataset_cache.load(file_path, columns)
+            if df is None:
+                df = pd.read_csv(file_path, index_col=0)
+                dataset_cache.store(file_path, df)
+                if columns is not None:
+                    df = df[[column for column in df.columns if column in columns]]
+            return pin_dtypes(df, dtype)
+        usecols = None
+        if columns is not None:
+            index_column = pd.read_csv(file_path, nrows=0).columns[0]
+            usecols = lambda column: column == index_column or column in columns
+        try:
+            df = pd.read_csv(file_path, index_col=0, usecols=usecols, dtype=dtype)
+        except (ValueError, TypeError):
+            if dtype is None:
+                raise
+            df = pin_dtypes(pd.read_csv(file_path, index_col=0, usecols=usecols), dtype)
         return df
     except FileNotFoundError:
         print(f'Error: couldn´t find file {file_path}')
@@ -15,9 +51,169 @@ def read_file(file_path):
         print(f"An exception type {type(e).__name__} has ocurred, please check the input file")
         sys.exit(1)
 
+def pin_dtypes(df:pd.DataFrame, dtype):
+    """Casts the columns of `df` named in `dtype`, leaving the ones that do not fit."""
+    for column, column_dtype in (dtype or {}).items():
+        if column in df.columns:
+            try:
+                df[column] = df[column].astype(column_dtype)
+            except (ValueError, TypeError):
+                continue
+    return df
+
+class ByteRange(io.RawIOBase):
+    """Read-only stream of the bytes [start, stop) of a binary file."""
+    def __init__(self, file, start, stop):
+        file.seek(start)
+        self.file = file
+        self.left = stop - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self.left)
+        if size <= 0:
+            return 0
+        read = self.file.readinto(memoryview(buffer)[:size])
+        self.left -= read
+        return read
+
+def line_shards(file_path, shards):
+    """
+    Splits the rows of a CSV file into at most `shards` byte ranges of about
+    the same size, every one starting at the beginning of a line and ending
+    after a newline (or at the end of the file), so each can be read on its
+    own with read_chunks(offset=start, stop=stop). The header line is left
+    out. Fields with embedded newlines are not supported.
+
+    Returns:
+        list[tuple[int, int]]: The (start, stop) ranges, in file order.
+    """
+    try:
+        size = os.path.getsize(file_path)
+        with open(file_path, 'rb') as file:
+            file.readline()
+            first = file.tell()
+            bounds = [first]
+            for k in range(1, shards):
+                target = first + (size - first) * k // shards
+                if target <= bounds[-1]:
+                    continue
+                file.seek(target - 1)
+                file.readline()
+                bounds.append(min(file.tell(), size))
+            bounds.append(size)
+    except FileNotFoundError:
+        print(f'Error: couldn´t find file {file_path}')
+        sys.exit(1)
+    except PermissionError:
+        print(f"Permission denied to access {file_path}")
+        sys.exit(1)
+    return [(start, stop) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+def read_chunks(file_path, chunksize, offset=0, columns=None, stop=None):
+    """
+    Reads a CSV file lazily, yielding DataFrames of at most `chunksize` rows,
+    so files larger than the available memory can be processed. With
+    `offset`, only the rows starting at that byte position are read (it must
+    be the start of a line); the column names still come from the header.
+    With `stop`, reading ends at that byte position (the end of a line, see
+    line_shards). With `columns`, only the index and those columns are
+    parsed, as in read_file. Errors are reported the same way as in
+    read_file.
+    """
+    try:
+        with open(file_path, 'rb') as file:
+            ranged = offset or stop is not None
+            names = pd.read_csv(file_path, nrows=0).columns.tolist() if ranged or columns is not None else None
+            usecols = None
+            if columns is not None:
+                usecols = lambda column: column == names[0] or column in columns
+            if ranged:
+                if stop is not None and stop <= offset:
+                    return
+                file.seek(offset)
+                source = file if stop is None else io.BufferedReader(ByteRange(file, offset, stop))
+                reader = pd.read_csv(source, names=names, header=None, index_col=0, usecols=usecols, chunksize=chunksize)
+            else:
+                reader = pd.read_csv(file, index_col=0, usecols=usecols, chunksize=chunksize)
+            with reader:
+                for chunk in reader:
+                    yield chunk
+    except FileNotFoundError:
+        print(f'Error: couldn´t find file {file_path}')
+        sys.exit(1)
+    except PermissionError:
+        print(f"Permission denied to access {file_path}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"An exception type {type(e).__name__} has ocurred, please check the input file")
+        sys.exit(1)
+
+def write_json(path, data):
+    """
+    Writes `data` as JSON atomically: the content goes to a temporary file in
+    the same directory which then replaces `path`, so readers (or a crash
+    halfway through) never see a partially written file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w') as tmp_file:
+            json.dump(data, tmp_file)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
 def termination_handler(signum, frame):
     print("Termination requested...")
     sys.exit(0)
+
+class GracefulStop():
+    """
+    Graceful termination of long running loops (training).
+
+    Scripts that can save their work install `GracefulStop.handler` for
+    SIGINT and SIGTERM instead of `termination_handler`. The first signal is
+    only recorded: the loops check `GracefulStop.requested()` at every step,
+    save their state and return. A second signal exits right away.
+
+    Worker processes follow the requests received by their parent through a
+    shared event: the parent creates it with `share()` and passes it to
+    `attach()` in each worker (e.g. as a pool initializer).
+    """
+    flag = False
+    event = None
+
+    @classmethod
+    def handler(cls, signum, frame):
+        if cls.flag:
+            print("Termination requested...")
+            sys.exit(1)
+        cls.flag = True
+        if cls.event is not None:
+            cls.event.set()
+        print("Termination requested, saving the current state (send the signal again to exit now)...")
+
+    @classmethod
+    def requested(cls):
+        return cls.flag or (cls.event is not None and cls.event.is_set())
+
+    @classmethod
+    def share(cls):
+        """Event set on the next request, for worker processes."""
+        if cls.event is None:
+            cls.event = multiprocessing.Event()
+            if cls.flag:
+                cls.event.set()
+        return cls.event
+
+    @classmethod
+    def attach(cls, event):
+        cls.event = event
      
 def get_mean(ds:pd.Series):
     valid = ds.dropna()